@@ -0,0 +1,76 @@
+import argparse
+import random
+import time
+
+from chunkers import sentence_chunk, recursive_chunk
+
+
+WORDS = (
+    "retrieval augmented generation grounds answers in external documents "
+    "chunking quality plays a major role in retrieval accuracy embeddings "
+    "map text into a numerical space where similar ideas are close together"
+).split()
+
+
+def make_text(n_chars: int, seed: int = 0) -> str:
+    """
+    Builds a synthetic document of roughly n_chars characters,
+    with sentences of varying length grouped into paragraphs.
+    """
+    rng = random.Random(seed)
+    paragraphs = []
+    size = 0
+
+    while size < n_chars:
+        sentences = []
+        for _ in range(rng.randint(2, 12)):
+            words = rng.choices(WORDS, k=rng.randint(4, 30))
+            sentences.append(" ".join(words).capitalize() + rng.choice(".!?"))
+        para = " ".join(sentences)
+        paragraphs.append(para)
+        size += len(para) + 2
+
+    return "\n\n".join(paragraphs)[:n_chars]
+
+
+def time_call(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, len(result)
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Checks that sentence and recursive chunking scale linearly with input size."
+    )
+    parser.add_argument("--sizes", default="1,10,100",
+                        help="comma-separated input sizes in MB (default: 1,10,100)")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    args = parser.parse_args()
+
+    sizes = [float(s) for s in args.sizes.split(",")]
+    chunkers = [("sentence_chunk", sentence_chunk), ("recursive_chunk", recursive_chunk)]
+
+    print(f"{'chunker':<16} {'size MB':>8} {'chunks':>10} {'seconds':>9} {'MB/s':>8} {'ns/char':>8}")
+
+    for name, fn in chunkers:
+        baseline = None
+
+        for mb in sizes:
+            text = make_text(int(mb * 1_000_000))
+            seconds, n_chunks = time_call(fn, text, args.chunk_size)
+            ns_per_char = seconds * 1e9 / len(text)
+
+            print(f"{name:<16} {mb:>8g} {n_chunks:>10} {seconds:>9.3f} "
+                  f"{mb / seconds:>8.1f} {ns_per_char:>8.1f}")
+
+            if baseline is None:
+                baseline = ns_per_char
+
+        # For linear scaling, the cost per character stays flat as the input grows
+        print(f"{name:<16} cost per char at largest size vs smallest: "
+              f"{ns_per_char / baseline:.2f}x\n")
+
+
+if __name__ == "__main__":
+    main()
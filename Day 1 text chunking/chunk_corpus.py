@@ -0,0 +1,347 @@
+"""
+chunk-corpus: chunks every text file under a directory in parallel.
+
+Files (and segments of large files) are spread across a process pool, with
+a bounded number of segments in flight. Results are streamed to the output
+in document order as (doc_id, chunk, start, end[, text]) records, where
+start/end are character offsets into the document.
+
+    python chunk_corpus.py ./corpus chunks.jsonl --strategy recursive --chunk-size 500
+"""
+import argparse
+import codecs
+import fnmatch
+import json
+import os
+import struct
+import sys
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+from chunkers import (
+    fixed_size_spans,
+    sentence_spans,
+    paragraph_spans,
+    overlapping_spans,
+    recursive_spans,
+)
+
+
+STRATEGIES = {
+    "fixed": lambda text, args: fixed_size_spans(text, args["chunk_size"]),
+    "sentence": lambda text, args: sentence_spans(text, args["chunk_size"]),
+    "paragraph": lambda text, args: paragraph_spans(text),
+    "overlapping": lambda text, args: overlapping_spans(text, args["chunk_size"], args["overlap"]),
+    "recursive": lambda text, args: recursive_spans(text, args["chunk_size"]),
+}
+
+# Strategies whose large files are cut at blank lines. paragraph and
+# recursive chunks never cross a blank line, so the chunks are the same as
+# processing the file whole; a sentence group simply ends at each cut. A
+# stretch with no blank line is cut at a newline or sentence end instead,
+# where the chunks may differ from processing the file whole.
+BLANK_LINE_CUTS = {"paragraph", "recursive", "sentence"}
+
+# Strategies whose chunks start every `step` characters. Cutting at a
+# multiple of the step gives the same chunks as processing the file whole.
+ALIGNED_CUTS = {"fixed", "overlapping"}
+
+# Binary output record: doc index, start offset, end offset
+BINARY_RECORD = struct.Struct("<IQQ")
+
+
+def iter_files(root: str, pattern: str):
+    """
+    Yields (doc_id, path) for every file under root matching pattern,
+    in a stable order. doc_id is the path relative to root.
+    """
+    for dirpath, dirnames, filenames in os.walk(root):
+        dirnames.sort()
+        for name in sorted(filenames):
+            if fnmatch.fnmatch(name, pattern):
+                path = os.path.join(dirpath, name)
+                yield os.path.relpath(path, root).replace(os.sep, "/"), path
+
+
+def segment_bounds(path: str, size: int, segment_bytes: int):
+    """
+    Splits a file into (start, end) byte ranges of roughly segment_bytes,
+    each cut placed just after a blank line ("\\n\\n"), or after a newline or
+    sentence end where no blank line follows within one segment.
+    """
+    bounds = []
+    start = 0
+
+    with open(path, "rb") as f:
+        target = segment_bytes
+        while target < size:
+            cut = _next_cut(f, target, size, target + segment_bytes)
+            if cut is None or cut >= size:
+                break
+
+            bounds.append((start, cut))
+            start = cut
+            target = cut + segment_bytes
+
+    bounds.append((start, size))
+    return bounds
+
+
+def _next_cut(f, target: int, size: int, limit: int):
+    """
+    Byte offset just after the first blank line at or after target, if it
+    comes before limit. Otherwise just after the first newline or sentence
+    end (". ", "! ", "? "), scanning as far as needed. None if there is none.
+    """
+    f.seek(target)
+    fallback = None
+    carry = b""
+    pos = target
+
+    while pos < size:
+        block = f.read(1 << 20)
+        if not block:
+            break
+        data = carry + block
+        base = pos - len(carry)
+
+        if fallback is None:
+            ends = [
+                data.find(sep) + len(sep)
+                for sep in (b"\n", b". ", b"! ", b"? ")
+                if data.find(sep) != -1
+            ]
+            if ends:
+                fallback = base + min(ends)
+
+        found = data.find(b"\n\n")
+        if found != -1:
+            blank = base + found + 2
+            return blank if fallback is None or blank <= limit else fallback
+
+        carry = block[-1:]
+        pos += len(block)
+        if fallback is not None and pos >= limit:
+            return fallback
+
+    return fallback
+
+
+def aligned_bounds(path: str, size: int, segment_bytes: int, step: int):
+    """
+    Splits a UTF-8 file into (start, end) byte ranges of roughly segment_bytes,
+    each cut placed at a character offset that is a multiple of step.
+    """
+    bounds = []
+    start = 0
+    decoder = codecs.getincrementaldecoder("utf-8")(errors="replace")
+
+    with open(path, "rb") as f:
+        target = segment_bytes
+        while target < size:
+            # Move the target off any UTF-8 continuation bytes
+            f.seek(target)
+            head = f.read(4)
+            target += next((i for i, b in enumerate(head) if b & 0xC0 != 0x80), len(head))
+
+            # Count the characters since the last cut
+            f.seek(start)
+            decoder.reset()
+            chars = 0
+            remaining = target - start
+            while remaining > 0:
+                block = f.read(min(remaining, 1 << 20))
+                remaining -= len(block)
+                chars += len(decoder.decode(block))
+
+            # Then move forward to the next multiple of step
+            extra = (-chars) % step
+            ahead = f.read(4 * extra).decode("utf-8", errors="replace")[:extra]
+            cut = target + len(ahead.encode("utf-8"))
+            if cut >= size:
+                break
+
+            bounds.append((start, cut))
+            start = cut
+            target = cut + segment_bytes
+
+    bounds.append((start, size))
+    return bounds
+
+
+def chunk_segment(task):
+    """
+    Worker: reads one file segment and chunks it.
+    Returns (doc_id, segment_char_length, [(start, end, text), ...])
+    with offsets relative to the segment; text is None unless include_text.
+    """
+    doc_id, path, byte_start, byte_end, strategy, params, include_text = task
+
+    with open(path, "rb") as f:
+        f.seek(byte_start)
+        text = f.read(byte_end - byte_start).decode("utf-8", errors="replace")
+        seg_len = len(text)
+        if strategy == "overlapping":
+            # The last windows run into the first `overlap` characters of the next segment
+            overlap = params["overlap"]
+            text += f.read(4 * overlap).decode("utf-8", errors="replace")[:overlap]
+
+    spans = STRATEGIES[strategy](text, params)
+    if strategy == "overlapping":
+        # Windows starting past the segment belong to the next one
+        spans = spans[:-(-seg_len // (params["chunk_size"] - overlap))]
+    return doc_id, seg_len, [(c.start, c.end, c.text if include_text else None) for c in spans]
+
+
+def build_tasks(root, pattern, strategy, params, segment_bytes, include_text):
+    for doc_id, path in iter_files(root, pattern):
+        size = os.path.getsize(path)
+
+        if size <= segment_bytes:
+            bounds = [(0, size)]
+        elif strategy in BLANK_LINE_CUTS:
+            bounds = segment_bounds(path, size, segment_bytes)
+        else:
+            step = params["chunk_size"] - (params["overlap"] if strategy == "overlapping" else 0)
+            bounds = aligned_bounds(path, size, segment_bytes, step)
+
+        for byte_start, byte_end in bounds:
+            yield doc_id, path, byte_start, byte_end, strategy, params, include_text
+
+
+def ordered_results(pool, fn, tasks, window: int):
+    """
+    Like pool.map(fn, tasks), but with at most window tasks submitted ahead,
+    so results finished behind one slow task don't pile up in memory.
+    """
+    pending = deque()
+    for task in tasks:
+        pending.append(pool.submit(fn, task))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+
+class JsonlWriter:
+    def __init__(self, path: str, include_text: bool):
+        self.f = open(path, "w", encoding="utf-8")
+        self.include_text = include_text
+
+    def write(self, doc_id, chunk_no, start, end, text):
+        record = {"doc_id": doc_id, "chunk": chunk_no, "start": start, "end": end}
+        if self.include_text:
+            record["text"] = text
+        self.f.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self):
+        self.f.close()
+
+
+class BinaryWriter:
+    """
+    Writes fixed-size (doc index, start, end) records.
+    Document ids are listed, by index, in a <output>.docs.json sidecar.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.f = open(path, "wb")
+        self.doc_ids = []
+        self.doc_index = {}
+
+    def write(self, doc_id, chunk_no, start, end, text):
+        if doc_id not in self.doc_index:
+            self.doc_index[doc_id] = len(self.doc_ids)
+            self.doc_ids.append(doc_id)
+        self.f.write(BINARY_RECORD.pack(self.doc_index[doc_id], start, end))
+
+    def close(self):
+        self.f.close()
+        with open(self.path + ".docs.json", "w", encoding="utf-8") as f:
+            json.dump(self.doc_ids, f)
+
+
+def chunk_corpus(root, output, strategy="recursive", chunk_size=500, overlap=50,
+                 workers=None, pattern="*.txt", segment_mb=64, fmt="jsonl",
+                 include_text=True):
+    """
+    Chunks every matching file under root and streams the results to output.
+    Returns (documents, chunks) counts.
+    """
+    if strategy not in STRATEGIES:
+        raise ValueError(f"Unknown strategy: {strategy}")
+    if strategy == "overlapping" and overlap >= chunk_size:
+        raise ValueError("Overlap must be smaller than chunk size")
+
+    params = {"chunk_size": chunk_size, "overlap": overlap}
+    # Workers only send chunk texts back when the output stores them
+    needs_text = fmt == "jsonl" and include_text
+    tasks = build_tasks(root, pattern, strategy, params, int(segment_mb * (1 << 20)), needs_text)
+    window = 2 * (workers or os.cpu_count() or 1)
+    writer = BinaryWriter(output) if fmt == "binary" else JsonlWriter(output, include_text)
+
+    n_docs = n_chunks = 0
+    current_doc = None
+    char_base = chunk_no = 0
+
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            # Results come back in task order, so segments of the same
+            # document arrive consecutively and offsets can be rebased here.
+            for doc_id, seg_len, spans in ordered_results(pool, chunk_segment, tasks, window):
+                if doc_id != current_doc:
+                    current_doc = doc_id
+                    char_base = chunk_no = 0
+                    n_docs += 1
+
+                for start, end, text in spans:
+                    writer.write(doc_id, chunk_no, char_base + start, char_base + end, text)
+                    chunk_no += 1
+
+                n_chunks += len(spans)
+                char_base += seg_len
+    finally:
+        writer.close()
+
+    return n_docs, n_chunks
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        prog="chunk-corpus",
+        description="Chunk a directory of text files in parallel.",
+    )
+    parser.add_argument("root", help="directory to walk")
+    parser.add_argument("output", help="output file (.jsonl, or binary records with --format binary)")
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="recursive")
+    parser.add_argument("--chunk-size", type=int, default=500)
+    parser.add_argument("--overlap", type=int, default=50, help="only used by --strategy overlapping")
+    parser.add_argument("--workers", type=int, default=None, help="default: number of CPUs")
+    parser.add_argument("--pattern", default="*.txt", help="filename glob (default: *.txt)")
+    parser.add_argument("--segment-mb", type=float, default=64,
+                        help="split larger files into segments of about this size")
+    parser.add_argument("--format", dest="fmt", choices=["jsonl", "binary"], default="jsonl")
+    parser.add_argument("--no-text", action="store_true", help="write offsets only (jsonl)")
+    args = parser.parse_args()
+
+    started = time.perf_counter()
+    n_docs, n_chunks = chunk_corpus(
+        args.root, args.output,
+        strategy=args.strategy,
+        chunk_size=args.chunk_size,
+        overlap=args.overlap,
+        workers=args.workers,
+        pattern=args.pattern,
+        segment_mb=args.segment_mb,
+        fmt=args.fmt,
+        include_text=not args.no_text,
+    )
+    elapsed = time.perf_counter() - started
+
+    print(f"{n_docs} documents, {n_chunks} chunks in {elapsed:.2f}s", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,9 +1,12 @@
+import io
+
 from chunkers import (
     fixed_size_chunk,
     sentence_chunk,
     paragraph_chunk,
     overlapping_chunk,
     recursive_chunk,
+    iter_recursive_chunk,
 )
 
 
@@ -39,6 +42,10 @@ def main():
     rc = recursive_chunk(text, target_size=150)
     print("Recursive:", len(rc))
 
+    # Streaming variant: reads from a file object instead of a full string
+    streamed = list(iter_recursive_chunk(io.StringIO(text), target_size=150))
+    print("Recursive (streamed):", len(streamed), "| matches list version:", streamed == rc)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,134 @@
+import hashlib
+from difflib import SequenceMatcher
+from typing import List, Tuple
+
+from chunkers import paragraph_chunk, recursive_chunk
+
+
+def _paragraph_key(para: str) -> bytes:
+    return hashlib.blake2b(para.encode("utf-8"), digest_size=16).digest()
+
+
+class ChunkDiff:
+    """
+    The result of re-chunking an edited document.
+
+    - unchanged: ids whose chunk text is identical
+    - changed:   (id, new_text) for chunks that kept their id but whose text changed
+    - added:     (id, text) for new chunks, with freshly assigned ids
+    - removed:   ids that no longer exist
+
+    Only `changed` and `added` need to be re-embedded.
+    """
+
+    def __init__(self):
+        self.unchanged: List[int] = []
+        self.changed: List[Tuple[int, str]] = []
+        self.added: List[Tuple[int, str]] = []
+        self.removed: List[int] = []
+
+    def __repr__(self):
+        return (
+            f"ChunkDiff(unchanged={len(self.unchanged)}, changed={len(self.changed)}, "
+            f"added={len(self.added)}, removed={len(self.removed)})"
+        )
+
+
+class ChunkLayout:
+    """
+    Recursive-chunk layout of a document, grouped by paragraph.
+
+    recursive_chunk never lets a chunk cross a paragraph break, so when a
+    document is edited only the paragraphs that actually changed need to be
+    chunked again. Chunks in untouched paragraphs keep their ids.
+    """
+
+    def __init__(self, target_size: int):
+        self.target_size = target_size
+        # One (paragraph_key, [(chunk_id, chunk_text), ...]) entry per paragraph
+        self.paragraphs = []
+        self.next_id = 0
+
+    @classmethod
+    def build(cls, text: str, target_size: int) -> "ChunkLayout":
+        layout = cls(target_size)
+        layout.paragraphs = [
+            (_paragraph_key(para), layout._chunk_paragraph(para))
+            for para in paragraph_chunk(text)
+        ]
+        return layout
+
+    def _chunk_paragraph(self, para: str):
+        chunks = []
+        for chunk in recursive_chunk(para, self.target_size):
+            chunks.append((self.next_id, chunk))
+            self.next_id += 1
+        return chunks
+
+    @property
+    def chunks(self) -> List[Tuple[int, str]]:
+        """All (chunk_id, chunk_text) pairs in document order."""
+        return [chunk for _, chunks in self.paragraphs for chunk in chunks]
+
+    def update(self, new_text: str) -> ChunkDiff:
+        """
+        Re-chunks the layout against an edited version of the document, in place.
+        Returns the ChunkDiff describing what changed.
+        """
+        new_paragraphs = paragraph_chunk(new_text)
+        new_keys = [_paragraph_key(p) for p in new_paragraphs]
+        old_keys = [key for key, _ in self.paragraphs]
+
+        diff = ChunkDiff()
+        updated = []
+
+        # autojunk would treat repeated boilerplate paragraphs as noise
+        matcher = SequenceMatcher(None, old_keys, new_keys, autojunk=False)
+
+        for op, i1, i2, j1, j2 in matcher.get_opcodes():
+            if op == "equal":
+                for entry in self.paragraphs[i1:i2]:
+                    diff.unchanged.extend(chunk_id for chunk_id, _ in entry[1])
+                    updated.append(entry)
+                continue
+
+            old_chunks = [c for _, chunks in self.paragraphs[i1:i2] for c in chunks]
+            old_by_text = {}
+            for chunk_id, text in old_chunks:
+                old_by_text.setdefault(text, []).append(chunk_id)
+
+            # Chunk only the edited paragraphs
+            new_entries = []
+            fresh = []
+            for para, key in zip(new_paragraphs[j1:j2], new_keys[j1:j2]):
+                chunks = [[None, text] for text in recursive_chunk(para, self.target_size)]
+                new_entries.append((key, chunks))
+                fresh.extend(chunks)
+
+            # Chunks whose text survived the edit keep their ids
+            reused = set()
+            for chunk in fresh:
+                ids = old_by_text.get(chunk[1])
+                if ids:
+                    chunk[0] = ids.pop(0)
+                    reused.add(chunk[0])
+                    diff.unchanged.append(chunk[0])
+
+            # Leftover old ids are reused, in order, for edited chunks
+            spare = [chunk_id for chunk_id, _ in old_chunks if chunk_id not in reused]
+            for chunk in fresh:
+                if chunk[0] is not None:
+                    continue
+                if spare:
+                    chunk[0] = spare.pop(0)
+                    diff.changed.append((chunk[0], chunk[1]))
+                else:
+                    chunk[0] = self.next_id
+                    self.next_id += 1
+                    diff.added.append((chunk[0], chunk[1]))
+
+            diff.removed.extend(spare)
+            updated.extend((key, [tuple(c) for c in chunks]) for key, chunks in new_entries)
+
+        self.paragraphs = updated
+        return diff
@@ -2,12 +2,20 @@ from typing import List, Dict
 import chromadb
 from chromadb.utils import embedding_functions
 from docs import DOCUMENTS, PARENT_CHILDREN
+from model_registry import get_model
+
+
+class SentenceTransformerEmbedding(embedding_functions.EmbeddingFunction):
+    def __init__(self, model_name="all-MiniLM-L6-v2"):
+        self.model_name = model_name
+
+    def __call__(self, input):
+        # Model is loaded on first use and shared across calls
+        return get_model(self.model_name).encode(input).tolist()
 
 
 def setup_chromadb():
-    embedding_fn = embedding_functions.SentenceTransformerEmbeddingFunction(
-        model_name="all-MiniLM-L6-v2"
-    )
+    embedding_fn = SentenceTransformerEmbedding("all-MiniLM-L6-v2")
     client = chromadb.EphemeralClient()
     
     try:
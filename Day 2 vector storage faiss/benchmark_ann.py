@@ -0,0 +1,184 @@
+"""
+Recall vs. latency of VectorStore index configurations.
+
+For each corpus size, the exact IndexFlatL2 store provides the ground truth,
+then every configuration in the sweep is built once and queried at each of
+its query-time settings. Results are written as JSON:
+
+    python benchmark_ann.py --sizes 10000 100000 1000000 --output ann_results.json
+    python benchmark_ann.py --vectors embeddings.npy --sizes 100000 --configs hnsw ivf
+"""
+import argparse
+import json
+import math
+import os
+import platform
+import time
+
+import faiss
+import numpy as np
+
+from faiss_store import VectorStore
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0, block: int = 100_000) -> np.ndarray:
+    """
+    Clustered Gaussian vectors (as in compare_precision.py), generated in
+    blocks so 10M x 384 fits in float32 memory without float64 temporaries.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 100, 1), dim)).astype(np.float32)
+    vectors = np.empty((n, dim), dtype=np.float32)
+    for start in range(0, n, block):
+        stop = min(start + block, n)
+        assigned = centers[rng.integers(0, len(centers), size=stop - start)]
+        vectors[start:stop] = assigned + 0.5 * rng.standard_normal((stop - start, dim), dtype=np.float32)
+    return vectors
+
+
+def default_nlist(n: int) -> int:
+    """Power of two near 4 * sqrt(n), the usual starting point for IVF."""
+    return int(min(2 ** round(math.log2(4 * math.sqrt(n))), 65536))
+
+
+def sweep(name: str, n: int, dim: int) -> list:
+    """
+    (store kwargs, list of search kwargs) for one named configuration.
+    Build settings scale with n; query-time settings are swept.
+    """
+    nlist = default_nlist(n)
+    pq_m = next(m for m in (dim // 8, dim // 4, dim // 2, dim) if m and dim % m == 0)
+
+    configs = {
+        "flat": ({"index_type": "flat"}, [{}]),
+        "flat-int8": ({"index_type": "flat", "precision": "int8"}, [{}]),
+        "hnsw": ({"index_type": "hnsw", "hnsw_m": 32},
+                 [{"ef_search": ef} for ef in (16, 32, 64, 128, 256)]),
+        "ivf": ({"index_type": "ivf", "nlist": nlist},
+                [{"nprobe": p} for p in (1, 4, 16, 64, 256) if p <= nlist]),
+        "ivfpq": ({"index_type": "ivfpq", "nlist": nlist, "pq_m": pq_m},
+                  [{"nprobe": p} for p in (1, 4, 16, 64, 256) if p <= nlist]),
+    }
+    return configs[name]
+
+
+def recall_at_k(results: list, truth: list, k: int) -> float:
+    hits = sum(len({chunk for chunk, _ in found} & expected) for found, expected in zip(results, truth))
+    return hits / (len(truth) * k)
+
+
+def build(vectors: np.ndarray, train_size: int, **store_kwargs):
+    store = VectorStore(vectors.shape[1], **store_kwargs)
+
+    start = time.perf_counter()
+    if not store.is_trained:
+        # Only the sampled rows are copied, never a corpus-sized array
+        rows = np.random.default_rng(1).choice(len(vectors), min(train_size, len(vectors)), replace=False)
+        store.train(vectors[np.sort(rows)])
+    store.add(vectors, list(range(len(vectors))))
+    return store, time.perf_counter() - start
+
+
+def measure(store: VectorStore, queries: np.ndarray, truth: list, k: int,
+            latency_queries: int, **search_kwargs) -> dict:
+    # Throughput: all queries in one batched call
+    start = time.perf_counter()
+    results = store.search_batch(queries, k, **search_kwargs)
+    elapsed = time.perf_counter() - start
+
+    # Latency: one query at a time, as an online request would arrive
+    latencies = []
+    for q in queries[:latency_queries]:
+        start = time.perf_counter()
+        store.search(q[None, :], k, **search_kwargs)
+        latencies.append((time.perf_counter() - start) * 1000)
+
+    return {
+        "recall": recall_at_k(results, truth, k),
+        "qps": len(queries) / elapsed,
+        "p50_ms": float(np.percentile(latencies, 50)),
+        "p99_ms": float(np.percentile(latencies, 99)),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall / latency / memory sweep over VectorStore index types.")
+    parser.add_argument("--vectors", default=None, help=".npy file of embeddings (default: synthetic)")
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--dim", type=int, default=384, help="dimension of synthetic vectors")
+    parser.add_argument("--configs", nargs="+", default=["flat", "flat-int8", "hnsw", "ivf", "ivfpq"],
+                        choices=["flat", "flat-int8", "hnsw", "ivf", "ivfpq"])
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--latency-queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--threads", type=int, default=None, help="FAISS OpenMP threads")
+    parser.add_argument("--output", default="ann_results.json")
+    args = parser.parse_args()
+
+    if args.threads:
+        faiss.omp_set_num_threads(args.threads)
+
+    if args.vectors:
+        source = np.load(args.vectors, mmap_mode="r")
+    else:
+        source = synthetic_vectors(max(args.sizes) + args.queries, args.dim)
+    queries = np.ascontiguousarray(source[:args.queries], dtype=np.float32)
+    corpus = source[args.queries:]
+
+    report = {
+        "meta": {
+            "dim": int(corpus.shape[1]),
+            "k": args.k,
+            "queries": len(queries),
+            "source": args.vectors or "synthetic",
+            "faiss": faiss.__version__,
+            "threads": faiss.omp_get_max_threads(),
+            "machine": platform.machine(),
+            "cpus": os.cpu_count(),
+        },
+        "results": [],
+    }
+
+    for size in args.sizes:
+        if size > len(corpus):
+            print(f"Skipping {size}: only {len(corpus)} vectors available")
+            continue
+        vectors = np.ascontiguousarray(corpus[:size], dtype=np.float32)
+
+        exact, _ = build(vectors, 0)  # flat L2 needs no training
+        truth = [{chunk for chunk, _ in found} for found in exact.search_batch(queries, args.k)]
+        del exact
+
+        print(f"\n{size} vectors, dim {vectors.shape[1]}, recall@{args.k}")
+        print(f"{'index':<10} {'params':<16} {'recall':>7} {'QPS':>9} {'p50 ms':>8} {'p99 ms':>8} {'build s':>8} {'MB':>8}")
+
+        for name in args.configs:
+            store_kwargs, search_sweep = sweep(name, size, vectors.shape[1])
+            store, build_s = build(vectors, 50 * store_kwargs.get("nlist", 1) + 10_000, **store_kwargs)
+            memory = store.memory_bytes()
+
+            for search_kwargs in search_sweep:
+                row = {
+                    "size": size,
+                    "index": name,
+                    "store": store_kwargs,
+                    "params": search_kwargs,
+                    "build_s": build_s,
+                    "memory_bytes": memory,
+                    "bytes_per_vector": memory / size,
+                }
+                row.update(measure(store, queries, truth, args.k, args.latency_queries, **search_kwargs))
+                report["results"].append(row)
+
+                params = ",".join(f"{k}={v}" for k, v in search_kwargs.items()) or "-"
+                print(f"{name:<10} {params:<16} {row['recall']:>7.3f} {row['qps']:>9.0f} "
+                      f"{row['p50_ms']:>8.2f} {row['p99_ms']:>8.2f} {build_s:>8.1f} {memory / 1e6:>8.1f}")
+            del store
+
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2)
+    print(f"\nWrote {len(report['results'])} rows to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,16 @@
+import codecs
+import mmap
 import re
-from typing import List, Callable
+from typing import List, Callable, Iterator, Tuple, Union, IO
+
+# Anything the streaming chunkers can read from: an in-memory string,
+# a text or binary file object, or a memory-mapped file.
+TextSource = Union[str, bytes, bytearray, memoryview, mmap.mmap, IO]
+
+# How many characters (or bytes, for binary sources) to pull per read.
+DEFAULT_BLOCK_SIZE = 1 << 16
+
+SENTENCE_BOUNDARY = re.compile(r'(?<=[.!?])\s+')
 
 
 def fixed_size_chunk(text: str, chunk_size: int) -> List[str]:
@@ -19,32 +30,67 @@ def fixed_size_chunk(text: str, chunk_size: int) -> List[str]:
     return chunks
 
 
-def sentence_chunk(text: str, max_chars: int) -> List[str]:
+# Sentence boundaries are located once, as offsets, with a single compiled
+# regex pass. Groups are formed from running length sums, and a chunk's
+# string is only built when it is emitted, which keeps both chunkers linear
+# in the size of the input.
+
+def _sentence_offsets(text: str, start: int, end: int) -> Iterator[Tuple[int, int]]:
     """
-    Groups sentences together until the chunk reaches the target size.
-    Helps keep thoughts intact while still controlling chunk length.
+    Yields the (start, end) offsets of the pieces SENTENCE_BOUNDARY.split
+    would return for text[start:end].
     """
-    # Basic sentence splitting using punctuation
-    sentences = re.split(r'(?<=[.!?])\s+', text)
+    prev = start
+    for match in SENTENCE_BOUNDARY.finditer(text, start, end):
+        yield prev, match.start()
+        prev = match.end()
+    yield prev, end
 
-    chunks = []
-    current = ""
 
-    for s in sentences:
-        # If adding the next sentence pushes us over the limit,
-        # store the current chunk and start a new one.
-        if len(current) + len(s) > max_chars:
-            if current:
-                chunks.append(current.strip())
-            current = s
+def _group_sentence_spans(text: str, start: int, end: int,
+                          max_chars: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Applies the sentence_chunk grouping rules to offsets.
+    Yields (start, end, joined_length) per group, where joined_length is the
+    length the group would have when its sentences are joined with single spaces.
+    """
+    group_start = group_end = start
+    group_len = 0
+
+    for s_start, s_end in _sentence_offsets(text, start, end):
+        length = s_end - s_start
+
+        if group_len + length > max_chars:
+            if group_len:
+                yield group_start, group_end, group_len
+            group_start, group_end, group_len = s_start, s_end, length
+        elif group_len:
+            group_end = s_end
+            group_len += 1 + length
         else:
-            current += " " + s if current else s
+            group_start, group_end, group_len = s_start, s_end, length
 
-    # Capture any leftover text
-    if current:
-        chunks.append(current.strip())
+    if group_len:
+        yield group_start, group_end, group_len
 
-    return chunks
+
+def _join_sentences(text: str, start: int, end: int) -> str:
+    """
+    Builds the output string for a sentence group spanning text[start:end],
+    with sentences joined by single spaces exactly as they are grouped.
+    """
+    return SENTENCE_BOUNDARY.sub(" ", text[start:end]).strip()
+
+
+def sentence_chunk(text: str, max_chars: int) -> List[str]:
+    """
+    Groups sentences together until the chunk reaches the target size.
+    Helps keep thoughts intact while still controlling chunk length.
+    """
+    return [
+        _join_sentences(text, start, end)
+        for start, end, _ in _group_sentence_spans(text, 0, len(text), max_chars)
+    ]
 
 
 def paragraph_chunk(text: str) -> List[str]:
@@ -110,39 +156,569 @@ def recursive_chunk(text: str, target_size: int) -> List[str]:
     Falls back to fixed-size chunks if needed.
     This tends to handle messy or uneven documents better than any single strategy.
     """
-    paragraphs = paragraph_chunk(text)
-    intermediate = []
+    final_chunks = []
 
-    for para in paragraphs:
+    for para in paragraph_spans(text):
         # If the paragraph already fits, keep it as-is
         if len(para) <= target_size:
-            intermediate.append(para)
+            final_chunks.append(para.text)
             continue
 
-        # Otherwise, break the paragraph into sentences
-        sentences = re.split(r'(?<=[.!?])\s+', para)
-        buffer = ""
+        # Otherwise, group the paragraph's sentences by their offsets
+        for start, end, _ in _group_sentence_spans(text, para.start, para.end, target_size):
+            chunk = _join_sentences(text, start, end)
 
-        for s in sentences:
-            # Start a new chunk when the buffer crosses the size limit
-            if len(buffer) + len(s) > target_size:
-                if buffer:
-                    intermediate.append(buffer.strip())
-                buffer = s
+            # Some groups may still be too large (e.g. one very long sentence).
+            # If so, fall back to fixed-size splitting.
+            if len(chunk) > target_size * 1.5:
+                final_chunks.extend(fixed_size_chunk(chunk, target_size))
             else:
-                buffer += " " + s if buffer else s
+                final_chunks.append(chunk)
 
-        if buffer:
-            intermediate.append(buffer.strip())
+    return final_chunks
 
-    final_chunks = []
 
-    # After sentence-level splitting, some chunks may still be too large.
-    # If so, fall back to fixed-size splitting.
-    for chunk in intermediate:
-        if len(chunk) > target_size * 1.5:
-            final_chunks.extend(fixed_size_chunk(chunk, target_size))
+# ---------------------------------------------------------------------------
+# Streaming variants
+#
+# The functions below mirror the list-based chunkers above but read their
+# input incrementally and yield chunks as soon as they are complete, so
+# multi-GB files can be chunked without loading them into memory.
+# Each iter_* function produces exactly the same chunks as its list
+# counterpart would for the same text.
+# ---------------------------------------------------------------------------
+
+
+def _iter_blocks(source: TextSource, block_size: int, encoding: str) -> Iterator[str]:
+    """
+    Yields the source as a sequence of decoded text blocks.
+    Binary sources (bytes, mmap, files opened in "rb") are decoded incrementally,
+    so multi-byte characters split across block edges are handled correctly.
+    """
+    if isinstance(source, str):
+        for i in range(0, len(source), block_size):
+            yield source[i:i + block_size]
+        return
+
+    decoder = codecs.getincrementaldecoder(encoding)()
+
+    if isinstance(source, (bytes, bytearray, memoryview, mmap.mmap)):
+        view = memoryview(source)
+        try:
+            for i in range(0, len(view), block_size):
+                block = decoder.decode(view[i:i + block_size])
+                if block:
+                    yield block
+        finally:
+            view.release()
+    else:
+        while True:
+            data = source.read(block_size)
+            if not data:
+                break
+            block = decoder.decode(data) if isinstance(data, (bytes, bytearray)) else data
+            if block:
+                yield block
+
+    tail = decoder.decode(b"", final=True)
+    if tail:
+        yield tail
+
+
+class _TextReader:
+    """
+    Small read buffer over a text source.
+    Only ever holds one block plus whatever the caller asks for.
+    """
+
+    def __init__(self, source: TextSource, block_size: int = DEFAULT_BLOCK_SIZE,
+                 encoding: str = "utf-8"):
+        self._blocks = _iter_blocks(source, block_size, encoding)
+        self._pending = ""
+        self._pos = 0
+
+    def read(self, n: int) -> str:
+        """Returns exactly n characters, or fewer once the source is exhausted."""
+        parts = []
+        while n > 0:
+            if self._pos >= len(self._pending):
+                self._pending = next(self._blocks, "")
+                self._pos = 0
+                if not self._pending:
+                    break
+            piece = self._pending[self._pos:self._pos + n]
+            self._pos += len(piece)
+            n -= len(piece)
+            parts.append(piece)
+        return "".join(parts)
+
+    def read_block(self) -> str:
+        """Returns the next available run of text, or "" at the end of the source."""
+        if self._pos < len(self._pending):
+            block = self._pending[self._pos:]
         else:
-            final_chunks.append(chunk)
+            block = next(self._blocks, "")
+        self._pending = ""
+        self._pos = 0
+        return block
 
-    return final_chunks
+
+def iter_fixed_size_chunk(source: TextSource, chunk_size: int,
+                          block_size: int = DEFAULT_BLOCK_SIZE,
+                          encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Streaming version of fixed_size_chunk.
+    Memory use is bounded by chunk_size and block_size.
+    """
+    reader = _TextReader(source, block_size, encoding)
+
+    while True:
+        piece = reader.read(chunk_size)
+        if not piece:
+            break
+        yield piece.strip()
+
+
+def _iter_split(source: TextSource, pattern, block_size: int,
+                encoding: str) -> Iterator[str]:
+    """
+    Streaming equivalent of pattern.split(text).
+    A separator is only accepted once text follows it in the buffer (or the
+    source ends), so a separator straddling two blocks is never cut short.
+    """
+    reader = _TextReader(source, block_size, encoding)
+    parts = []  # settled text of the current piece, joined once it ends
+    buffer = ""
+    start = 0
+    scan_from = 0
+    exhausted = False
+
+    while True:
+        match = pattern.search(buffer, scan_from)
+
+        if match and (match.end() < len(buffer) or exhausted):
+            parts.append(buffer[start:match.start()])
+            yield "".join(parts)
+            parts = []
+            start = scan_from = match.end()
+            continue
+
+        if exhausted:
+            parts.append(buffer[start:])
+            yield "".join(parts)
+            return
+
+        # Only the region that could still grow into a match needs re-scanning;
+        # the text before it (less one character of look-behind) is settled
+        scan_from = match.start() if match else max(len(buffer) - 1, start)
+        keep = max(scan_from - 1, start)
+
+        block = reader.read_block()
+        if block:
+            parts.append(buffer[start:keep])
+            buffer = buffer[keep:] + block
+            scan_from -= keep
+            start = 0
+        else:
+            exhausted = True
+
+
+def iter_sentences(source: TextSource, block_size: int = DEFAULT_BLOCK_SIZE,
+                   encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Yields the same pieces as splitting the text with SENTENCE_BOUNDARY.
+    Only the sentence currently being read is held in memory.
+    """
+    return _iter_split(source, SENTENCE_BOUNDARY, block_size, encoding)
+
+
+def _group_sentences(sentences, max_chars: int) -> Iterator[str]:
+    """
+    Packs sentences into chunks of at most max_chars,
+    using the same rules as sentence_chunk.
+    Sentences are collected in a list and joined once per chunk.
+    """
+    current = []
+    current_len = 0
+
+    for s in sentences:
+        if current_len + len(s) > max_chars:
+            if current_len:
+                yield " ".join(current).strip()
+            current = [s]
+            current_len = len(s)
+        elif current_len:
+            current.append(s)
+            current_len += 1 + len(s)
+        else:
+            current = [s]
+            current_len = len(s)
+
+    if current_len:
+        yield " ".join(current).strip()
+
+
+def iter_sentence_chunk(source: TextSource, max_chars: int,
+                        block_size: int = DEFAULT_BLOCK_SIZE,
+                        encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Streaming version of sentence_chunk.
+    Memory is bounded by max_chars plus the longest single sentence.
+    """
+    return _group_sentences(iter_sentences(source, block_size, encoding), max_chars)
+
+
+def iter_paragraph_chunk(source: TextSource, block_size: int = DEFAULT_BLOCK_SIZE,
+                         encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Streaming version of paragraph_chunk.
+    Memory is bounded by the longest paragraph.
+    """
+    reader = _TextReader(source, block_size, encoding)
+    parts = []  # the current paragraph, minus the buffered tail
+    buffer = ""
+
+    while True:
+        block = reader.read_block()
+        if not block:
+            break
+        buffer += block
+
+        # Emit every paragraph whose closing blank line is fully buffered
+        start = 0
+        end = buffer.find("\n\n")
+        while end != -1:
+            parts.append(buffer[start:end])
+            para = "".join(parts).strip()
+            parts = []
+            if para:
+                yield para
+            start = end + 2
+            end = buffer.find("\n\n", start)
+
+        # A trailing "\n" may pair with a newline from the next block
+        keep = max(len(buffer) - 1, start)
+        parts.append(buffer[start:keep])
+        buffer = buffer[keep:]
+
+    parts.append(buffer)
+    para = "".join(parts).strip()
+    if para:
+        yield para
+
+
+def iter_overlapping_chunk(source: TextSource, chunk_size: int, overlap: int,
+                           block_size: int = DEFAULT_BLOCK_SIZE,
+                           encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Streaming version of overlapping_chunk.
+    Only the current window of chunk_size characters is kept in memory.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("Overlap must be smaller than chunk size")
+
+    return _iter_windows(_TextReader(source, block_size, encoding), chunk_size, chunk_size - overlap)
+
+
+def _iter_windows(reader: _TextReader, chunk_size: int, step: int) -> Iterator[str]:
+    window = reader.read(chunk_size)
+
+    while window:
+        yield window.strip()
+
+        # Slide forward, keeping the overlapping tail of the current window
+        window = window[step:] + reader.read(step)
+
+
+def iter_recursive_chunk(source: TextSource, target_size: int,
+                         block_size: int = DEFAULT_BLOCK_SIZE,
+                         encoding: str = "utf-8") -> Iterator[str]:
+    """
+    Streaming version of recursive_chunk.
+    Works one paragraph at a time, so memory is bounded by the longest paragraph.
+    """
+    for para in iter_paragraph_chunk(source, block_size, encoding):
+        if len(para) <= target_size:
+            pieces = [para]
+        else:
+            pieces = (
+                _join_sentences(para, start, end)
+                for start, end, _ in _group_sentence_spans(para, 0, len(para), target_size)
+            )
+
+        for chunk in pieces:
+            if len(chunk) > target_size * 1.5:
+                yield from fixed_size_chunk(chunk, target_size)
+            else:
+                yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Span variants
+#
+# Instead of slicing and stripping a new string per chunk, these return
+# Chunk records holding (start, end) offsets into the source text.
+# The text is only materialized when asked for, and overlapping chunks
+# no longer hold two copies of the shared region.
+# ---------------------------------------------------------------------------
+
+
+class Chunk:
+    """
+    A chunk stored as a [start, end) span of its source text.
+    Only the two offsets and a reference to the source are kept.
+    """
+
+    __slots__ = ("source", "start", "end")
+
+    def __init__(self, source: str, start: int, end: int):
+        self.source = source
+        self.start = start
+        self.end = end
+
+    @property
+    def text(self) -> str:
+        """Slices the chunk text out of the source on demand."""
+        return self.source[self.start:self.end]
+
+    @property
+    def offsets(self) -> Tuple[int, int]:
+        return self.start, self.end
+
+    def __len__(self) -> int:
+        return self.end - self.start
+
+    def __str__(self) -> str:
+        return self.text
+
+    def __repr__(self) -> str:
+        return f"Chunk(start={self.start}, end={self.end})"
+
+
+def _strip_span(text: str, start: int, end: int) -> Tuple[int, int]:
+    """
+    Narrows [start, end) to exclude surrounding whitespace,
+    matching what str.strip() would remove, without copying.
+    """
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
+
+
+def _span(text: str, start: int, end: int) -> Chunk:
+    start, end = _strip_span(text, start, end)
+    return Chunk(text, start, end)
+
+
+def fixed_size_spans(text: str, chunk_size: int) -> List[Chunk]:
+    """
+    Span version of fixed_size_chunk.
+    chunk.text equals the corresponding fixed_size_chunk output.
+    """
+    return [
+        _span(text, start, min(start + chunk_size, len(text)))
+        for start in range(0, len(text), chunk_size)
+    ]
+
+
+def overlapping_spans(text: str, chunk_size: int, overlap: int) -> List[Chunk]:
+    """
+    Span version of overlapping_chunk.
+    The overlap is shared by offset rather than copied into both chunks.
+    """
+    if overlap >= chunk_size:
+        raise ValueError("Overlap must be smaller than chunk size")
+
+    return [
+        _span(text, start, min(start + chunk_size, len(text)))
+        for start in range(0, len(text), chunk_size - overlap)
+    ]
+
+
+def paragraph_spans(text: str) -> List[Chunk]:
+    """
+    Span version of paragraph_chunk.
+    """
+    spans = []
+    start = 0
+
+    while True:
+        end = text.find("\n\n", start)
+        chunk = _span(text, start, len(text) if end == -1 else end)
+        if len(chunk):
+            spans.append(chunk)
+        if end == -1:
+            return spans
+        start = end + 2
+
+
+def sentence_spans(text: str, max_chars: int) -> List[Chunk]:
+    """
+    Span version of sentence_chunk.
+    Groups are the same as sentence_chunk's, but because a span covers the
+    original text, the whitespace between sentences is kept as-is instead of
+    being collapsed to a single space.
+    """
+    return [
+        _span(text, s, e)
+        for s, e, _ in _group_sentence_spans(text, 0, len(text), max_chars)
+    ]
+
+
+def recursive_spans(text: str, target_size: int) -> List[Chunk]:
+    """
+    Span version of recursive_chunk.
+    Like sentence_spans, inter-sentence whitespace is preserved. Because the
+    fixed-size fallback for oversized groups then cuts the original text
+    rather than the re-joined one, its chunk boundaries can also shift, so
+    .text may differ from recursive_chunk output beyond whitespace.
+    """
+    spans = []
+
+    for para in paragraph_spans(text):
+        if len(para) <= target_size:
+            spans.append(para)
+            continue
+
+        for s, e, joined_len in _group_sentence_spans(text, para.start, para.end, target_size):
+            if joined_len > target_size * 1.5:
+                # Same fixed-size fallback as recursive_chunk, applied to offsets
+                spans.extend(
+                    _span(text, i, min(i + target_size, e))
+                    for i in range(s, e, target_size)
+                )
+            else:
+                spans.append(_span(text, s, e))
+
+    return spans
+
+
+# ---------------------------------------------------------------------------
+# Token-offset variants
+#
+# token_aware_chunk tokenizes the whole text up front and re-decodes every
+# window. These variants instead use a fast (HuggingFace-style) tokenizer's
+# offset mapping: windows are cut by token count, but the chunk is a span
+# of the original text, so nothing is decoded. Long documents are tokenized
+# in bounded segments, and segments/documents are tokenized in batches.
+#
+# `tokenizer` must support:
+#     tokenizer(list_of_texts, add_special_tokens=False,
+#               return_offsets_mapping=True)["offset_mapping"]
+# ---------------------------------------------------------------------------
+
+
+def _token_offsets(texts: List[str], tokenizer) -> List[List[Tuple[int, int]]]:
+    """
+    Tokenizes a batch of texts in one call and returns each text's
+    per-token (start, end) character offsets.
+    """
+    encoded = tokenizer(
+        texts,
+        add_special_tokens=False,
+        return_offsets_mapping=True,
+        return_attention_mask=False,
+    )
+    return encoded["offset_mapping"]
+
+
+def _segment_bounds(text: str, segment_chars: int) -> Iterator[Tuple[int, int]]:
+    """
+    Cuts text into segments of at most segment_chars, ending each segment
+    on whitespace where possible so no word is split between segments.
+    """
+    start = 0
+
+    while start < len(text):
+        end = min(start + segment_chars, len(text))
+
+        if end < len(text):
+            cut = end
+            while cut > start and not text[cut - 1].isspace():
+                cut -= 1
+            if cut > start:
+                end = cut
+
+        yield start, end
+        start = end
+
+
+def _token_windows(offsets: Iterator[Tuple[int, int]], max_tokens: int,
+                   overlap: int) -> Iterator[Tuple[int, int]]:
+    """
+    Slides a window of max_tokens over a stream of token offsets, moving
+    forward by max_tokens - overlap tokens. Yields each window's character range.
+    Only the tokens of the current window are held in memory.
+    """
+    step = max_tokens - overlap
+    window = []
+
+    for offset in offsets:
+        window.append(offset)
+        if len(window) == max_tokens:
+            yield window[0][0], window[-1][1]
+            del window[:step]
+
+    # Tail windows, same as token_aware_chunk's `while start < len(token_ids)`
+    # once the last full window has been emitted
+    while window:
+        yield window[0][0], window[-1][1]
+        del window[:step]
+
+
+def _check_token_window(max_tokens: int, overlap: int):
+    if max_tokens <= 0:
+        raise ValueError("max_tokens must be positive")
+    if overlap >= max_tokens:
+        raise ValueError("Overlap must be smaller than max_tokens")
+
+
+def _streamed_token_offsets(text: str, tokenizer, segment_chars: int,
+                            batch_size: int) -> Iterator[Tuple[int, int]]:
+    """
+    Yields document-level token offsets for text, tokenizing batch_size
+    segments of at most segment_chars per tokenizer call.
+    """
+    segments = _segment_bounds(text, segment_chars)
+
+    while True:
+        batch = [seg for _, seg in zip(range(batch_size), segments)]
+        if not batch:
+            return
+
+        texts = [text[s:e] for s, e in batch]
+        for (seg_start, _), seg_offsets in zip(batch, _token_offsets(texts, tokenizer)):
+            for tok_start, tok_end in seg_offsets:
+                yield seg_start + tok_start, seg_start + tok_end
+
+
+def iter_token_spans(text: str, tokenizer, max_tokens: int, overlap: int = 0,
+                     segment_chars: int = 8192, batch_size: int = 32) -> Iterator[Chunk]:
+    """
+    Incremental, offset-based token chunking for a single (possibly very long) text.
+    Token ids are never kept: only the offsets of the current window are,
+    and each chunk is a Chunk span of the original text.
+    """
+    _check_token_window(max_tokens, overlap)
+
+    offsets = _streamed_token_offsets(text, tokenizer, segment_chars, batch_size)
+    return (
+        _span(text, start, end)
+        for start, end in _token_windows(offsets, max_tokens, overlap)
+    )
+
+
+def token_spans_batch(texts: List[str], tokenizer, max_tokens: int,
+                      overlap: int = 0) -> List[List[Chunk]]:
+    """
+    Token chunking for a list of documents, tokenized in one batched call.
+    Returns one list of Chunk spans per document.
+    """
+    _check_token_window(max_tokens, overlap)
+
+    return [
+        [_span(text, start, end) for start, end in _token_windows(iter(offsets), max_tokens, overlap)]
+        for text, offsets in zip(texts, _token_offsets(texts, tokenizer))
+    ]
@@ -0,0 +1,66 @@
+import argparse
+
+import numpy as np
+
+from faiss_store import VectorStore, PRECISIONS
+
+
+def synthetic_vectors(n: int, dim: int, seed: int = 0) -> np.ndarray:
+    """
+    Clustered Gaussian vectors, closer to real embeddings than uniform noise.
+    """
+    rng = np.random.default_rng(seed)
+    centers = rng.normal(size=(max(n // 100, 1), dim))
+    vectors = centers[rng.integers(0, len(centers), size=n)] + 0.5 * rng.normal(size=(n, dim))
+    return vectors.astype(np.float32)
+
+
+def recall_at_k(store: VectorStore, queries: np.ndarray, truth: list, k: int) -> float:
+    hits = 0
+    for results, expected in zip(store.search_batch(queries, k), truth):
+        found = {chunk for chunk, _ in results}
+        hits += len(found & expected)
+    return hits / (len(queries) * k)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Recall and memory of each VectorStore precision (and dimension reduction).")
+    parser.add_argument("--vectors", default=None, help=".npy file of embeddings (default: synthetic)")
+    parser.add_argument("--n", type=int, default=20000)
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=10)
+    parser.add_argument("--reduce-to", type=int, default=None, help="also store reduced vectors of this dimension")
+    parser.add_argument("--reduction", choices=["pca", "truncate"], default="pca")
+    args = parser.parse_args()
+
+    vectors = np.load(args.vectors).astype(np.float32) if args.vectors else synthetic_vectors(args.n, args.dim)
+    queries, vectors = vectors[:args.queries], vectors[args.queries:]
+    ids = list(range(len(vectors)))
+
+    # Ground truth from the exact float32 index
+    exact = VectorStore(vectors.shape[1])
+    exact.add(vectors, ids)
+    truth = [{chunk for chunk, _ in results} for results in exact.search_batch(queries, args.k)]
+
+    print(f"{len(vectors)} vectors, dim {vectors.shape[1]}, recall@{args.k} over {len(queries)} queries\n")
+    print(f"{'precision':<10} {'recall':>8} {'bytes/vec':>10} {'total MB':>9}")
+
+    dims = [None] if args.reduce_to is None else [None, args.reduce_to]
+    for reduce_to in dims:
+        if reduce_to is not None:
+            print(f"\n{args.reduction} to {reduce_to} dimensions")
+
+        for precision in PRECISIONS:
+            store = VectorStore(vectors.shape[1], precision=precision,
+                                reduce_to=reduce_to, reduction=args.reduction)
+            store.train(vectors)
+            store.add(vectors, ids)
+
+            recall = recall_at_k(store, queries, truth, args.k)
+            total = store.memory_bytes()
+            print(f"{precision:<10} {recall:>8.3f} {total / len(vectors):>10.1f} {total / 1e6:>9.2f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+import hashlib
+import zlib
+
+import numpy as np
+
+
+_MERSENNE_PRIME = (1 << 31) - 1
+
+
+def _normalize(text: str) -> str:
+    # Collapse whitespace and case so trivially reformatted copies hash the same
+    return " ".join(text.split()).lower()
+
+
+class ChunkDeduplicator:
+    """
+    Removes exact and near-duplicate chunks before they are embedded.
+
+    Exact copies are caught with a content hash of the normalized text.
+    Near-duplicates are caught with MinHash signatures over character shingles,
+    indexed with LSH banding so each chunk is only compared against likely matches.
+
+    The first chunk seen in each duplicate group is kept as its representative;
+    `groups` records which chunk ids collapsed into it. State is kept across
+    calls, so every chunk id must be unique over the deduplicator's lifetime.
+    """
+
+    def __init__(self, threshold: float = 0.85, num_perm: int = 128, bands: int = 16,
+                 shingle_size: int = 5, near_duplicates: bool = True, seed: int = 1):
+        if num_perm % bands:
+            raise ValueError("num_perm must be divisible by bands")
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.bands = bands
+        self.rows = num_perm // bands
+        self.shingle_size = shingle_size
+        self.near_duplicates = near_duplicates
+
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(1, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+        self._b = rng.integers(0, _MERSENNE_PRIME, size=num_perm, dtype=np.uint64)
+
+        self._exact = {}  # content hash -> representative id
+        self._buckets = [{} for _ in range(bands)]  # band key -> representative ids
+        self._signatures = {}  # representative id -> MinHash signature
+        self.groups = {}  # representative id -> ids collapsed into it (including itself)
+        self._registered = set()  # every chunk id added so far
+        self.next_id = 0  # first default id of the next dedup() call
+
+    def _signature(self, text: str) -> np.ndarray:
+        k = self.shingle_size
+        shingles = {text[i:i + k] for i in range(max(len(text) - k + 1, 1))}
+        hashes = np.fromiter(
+            (zlib.crc32(s.encode("utf-8")) & _MERSENNE_PRIME for s in shingles),
+            dtype=np.uint64,
+            count=len(shingles),
+        )
+
+        # One universal hash per permutation: (a * x + b) mod p, minimized over shingles.
+        # Operands stay below 2**31, so the products fit in uint64.
+        permuted = (np.outer(hashes, self._a) + self._b) % _MERSENNE_PRIME
+        return permuted.min(axis=0)
+
+    def _band_keys(self, signature: np.ndarray):
+        r = self.rows
+        return [signature[i * r:(i + 1) * r].tobytes() for i in range(self.bands)]
+
+    def add(self, text: str, chunk_id):
+        """
+        Registers one chunk.
+        Returns the id of the representative it duplicates, or None if it is new
+        (in which case it becomes a representative itself).
+        """
+        if chunk_id in self._registered:
+            raise ValueError(f"Chunk id {chunk_id!r} was already added")
+        self._registered.add(chunk_id)
+        if isinstance(chunk_id, int):
+            self.next_id = max(self.next_id, chunk_id + 1)
+
+        normalized = _normalize(text)
+        digest = hashlib.blake2b(normalized.encode("utf-8"), digest_size=16).digest()
+
+        rep = self._exact.get(digest)
+        if rep is not None:
+            self.groups[rep].append(chunk_id)
+            return rep
+
+        if self.near_duplicates:
+            signature = self._signature(normalized)
+            keys = self._band_keys(signature)
+
+            # Verify LSH candidates with the estimated Jaccard similarity
+            seen = set()
+            for band, key in zip(self._buckets, keys):
+                for candidate in band.get(key, ()):
+                    if candidate in seen:
+                        continue
+                    seen.add(candidate)
+                    similarity = np.mean(self._signatures[candidate] == signature)
+                    if similarity >= self.threshold:
+                        self._exact[digest] = candidate
+                        self.groups[candidate].append(chunk_id)
+                        return candidate
+
+            self._signatures[chunk_id] = signature
+            for band, key in zip(self._buckets, keys):
+                band.setdefault(key, []).append(chunk_id)
+
+        self._exact[digest] = chunk_id
+        self.groups[chunk_id] = [chunk_id]
+        return None
+
+    def dedup(self, chunks: list, ids: list = None):
+        """
+        Filters a list of chunks down to the ones not seen before.
+        Returns (unique_chunks, unique_ids). Ids default to consecutive
+        integers, continuing after the ids already added.
+        """
+        if ids is None:
+            ids = list(range(self.next_id, self.next_id + len(chunks)))
+        if len(ids) != len(chunks):
+            raise ValueError("Id count must match chunk count")
+        # Checked up front, so a rejected call registers nothing
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in one call")
+        if any(chunk_id in self._registered for chunk_id in ids):
+            raise ValueError("Chunk id already added; ids must be unique across calls")
+
+        unique_chunks, unique_ids = [], []
+        for chunk, chunk_id in zip(chunks, ids):
+            if self.add(chunk, chunk_id) is None:
+                unique_chunks.append(chunk)
+                unique_ids.append(chunk_id)
+
+        return unique_chunks, unique_ids
+
+    def duplicate_groups(self) -> dict:
+        """Representatives that absorbed at least one other chunk, with their members."""
+        return {rep: members for rep, members in self.groups.items() if len(members) > 1}
+
+
+def dedup_chunks(chunks: list, ids: list = None, threshold: float = 0.85,
+                 near_duplicates: bool = True):
+    """
+    One-shot helper around ChunkDeduplicator.
+    Returns (unique_chunks, unique_ids, groups).
+    """
+    dedup = ChunkDeduplicator(threshold=threshold, near_duplicates=near_duplicates)
+    unique_chunks, unique_ids = dedup.dedup(chunks, ids)
+    return unique_chunks, unique_ids, dedup.groups
@@ -3,6 +3,7 @@ sys.path.append(os.path.dirname(os.path.abspath(__file__)))
 
 
 from chunkers import sentence_chunk
+from dedup import ChunkDeduplicator
 from embedder import Embedder
 from faiss_store import VectorStore
 import numpy as np
@@ -26,6 +27,10 @@ def main():
     # Step 1: Chunking
     chunks = sentence_chunk(text, max_chars=200)
 
+    # Step 1b: Drop exact and near-duplicate chunks so they are not embedded twice
+    dedup = ChunkDeduplicator()
+    chunks, _ = dedup.dedup(chunks)
+
     # Step 2: Embeddings
     embedder = Embedder()
     vectors = embedder.encode(chunks)
@@ -0,0 +1,317 @@
+import json
+import os
+import re
+import shutil
+import struct
+import threading
+import zlib
+
+import numpy as np
+
+from faiss_store import VectorStore, as_int_ids
+
+CURRENT_FILE = "CURRENT"
+
+# Snapshot directories and log segments; anything else is not ours (or is
+# a snapshot-NNNNNN.tmp-PID / .old-PID directory left by an interrupted save)
+SNAPSHOT_NAME = re.compile(r"snapshot-(\d{6})$")
+SEGMENT_NAME = re.compile(r"wal-(\d{6})\.log$")
+
+# Each record: json length, vector byte count, crc32 of both payloads
+RECORD_HEADER = struct.Struct("<III")
+
+
+def _snapshot_name(seq: int) -> str:
+    return f"snapshot-{seq:06d}"
+
+
+def _segment_name(seq: int) -> str:
+    return f"wal-{seq:06d}.log"
+
+
+def _numbered(path: str, pattern) -> dict:
+    """{seq: name} of the entries in path whose whole name matches pattern."""
+    found = {}
+    for name in os.listdir(path):
+        match = pattern.match(name)
+        if match:
+            found[int(match.group(1))] = name
+    return found
+
+
+class WriteAheadLog:
+    """
+    Append-only log of store operations.
+
+    Records are encoded first, written with append() and only fsynced every
+    sync_every committed records (or on sync()), which keeps long ingestion
+    jobs fast; a crash can lose at most the records since the last sync. A
+    record torn by a crash fails its checksum and ends the replay.
+    """
+
+    def __init__(self, path: str, sync_every: int = 64):
+        self.path = path
+        self.sync_every = sync_every
+        self.pending = 0
+        self.file = open(path, "ab")
+
+    @staticmethod
+    def encode(op: str, ids: list, vectors: np.ndarray = None, chunks: list = None,
+               metadata: list = None) -> bytes:
+        """The bytes of one record; raises if the chunks or metadata aren't JSON-serializable."""
+        header = {"op": op, "ids": ids, "chunks": chunks, "metadata": metadata}
+        vector_bytes = b""
+        if vectors is not None:
+            vectors = np.ascontiguousarray(vectors, dtype="<f4")
+            header["shape"] = list(vectors.shape)
+            vector_bytes = vectors.tobytes()
+
+        header_bytes = json.dumps(header).encode("utf-8")
+        crc = zlib.crc32(vector_bytes, zlib.crc32(header_bytes))
+        return RECORD_HEADER.pack(len(header_bytes), len(vector_bytes), crc) + header_bytes + vector_bytes
+
+    def append(self, record: bytes) -> int:
+        """Writes an encoded record and returns its offset, for undo()."""
+        offset = self.file.tell()
+        self.file.write(record)
+        return offset
+
+    def undo(self, offset: int):
+        """Drops the record written at offset, e.g. because applying it failed."""
+        self.file.truncate(offset)
+
+    def commit(self):
+        """Counts the last record as done, syncing every sync_every records."""
+        self.pending += 1
+        if self.pending >= self.sync_every:
+            self.sync()
+
+    def sync(self):
+        if self.pending:
+            self.file.flush()
+            os.fsync(self.file.fileno())
+            self.pending = 0
+
+    def close(self):
+        self.sync()
+        self.file.close()
+
+    @staticmethod
+    def replay(path: str):
+        """Yields the records of a log file, stopping at the first incomplete one."""
+        with open(path, "rb") as f:
+            while True:
+                raw = f.read(RECORD_HEADER.size)
+                if len(raw) < RECORD_HEADER.size:
+                    return
+                header_len, vector_len, crc = RECORD_HEADER.unpack(raw)
+                header_bytes = f.read(header_len)
+                vector_bytes = f.read(vector_len)
+                if (len(header_bytes) < header_len or len(vector_bytes) < vector_len
+                        or zlib.crc32(vector_bytes, zlib.crc32(header_bytes)) != crc):
+                    return
+
+                record = json.loads(header_bytes)
+                if "shape" in record:
+                    record["vectors"] = np.frombuffer(vector_bytes, dtype="<f4").reshape(record["shape"])
+                yield record
+
+
+class DurableVectorStore:
+    """
+    VectorStore backed by snapshots plus a write-ahead log.
+
+    The directory holds snapshot-NNNNNN/ (a VectorStore.save directory),
+    wal-NNNNNN.log segments and a CURRENT file naming the live snapshot.
+    Snapshot N contains every operation logged in segments below N.
+
+    Every add / upsert / delete is logged before the call returns, so a long
+    ingestion job can crash and resume from the last synced record. A
+    checkpoint starts a new log segment, then writes a copy of the store as
+    the next snapshot in a background thread and drops the segments it
+    covers; writes continue into the new segment meanwhile. Opening a store
+    replays the segments newer than its snapshot and checkpoints them.
+
+        store = DurableVectorStore.open("my_store", VectorStore(384))
+        store.add(vectors, chunks)
+        store.search(query_vec, k=3)
+    """
+
+    def __init__(self, path: str, store: VectorStore, seq: int, sync_every: int = 64,
+                 snapshot_every: int = None):
+        self.path = path
+        self.store = store
+        self.seq = seq
+        self.sync_every = sync_every
+        self.snapshot_every = snapshot_every
+        self.records_since_snapshot = 0
+        self.wal = WriteAheadLog(os.path.join(path, _segment_name(seq)), sync_every)
+        self._lock = threading.Lock()
+        self._snapshot_thread = None
+
+    @classmethod
+    def open(cls, path: str, store: VectorStore = None, **kwargs) -> "DurableVectorStore":
+        """
+        Opens the store at path, replaying any log written since its snapshot.
+        store is the empty VectorStore to start from when path is new.
+        """
+        current_path = os.path.join(path, CURRENT_FILE)
+
+        if not os.path.exists(current_path):
+            if store is None:
+                raise ValueError("New durable store needs an empty VectorStore to start from")
+            os.makedirs(path, exist_ok=True)
+            durable = cls(path, store, seq=0, **kwargs)
+            durable._write_snapshot(store.copy(), 0)
+            return durable
+
+        with open(current_path) as f:
+            current = json.load(f)
+
+        store = VectorStore(1)
+        store.load(os.path.join(path, current["snapshot"]))
+
+        # Replay every segment the snapshot doesn't cover, oldest first
+        segments = sorted(_numbered(path, SEGMENT_NAME))
+        replayed = 0
+        for seq in segments:
+            if seq >= current["seq"]:
+                for record in WriteAheadLog.replay(os.path.join(path, _segment_name(seq))):
+                    cls._apply(store, record)
+                    replayed += 1
+
+        # New writes go to a fresh segment; a torn tail stays behind in the old one
+        durable = cls(path, store, seq=(segments[-1] + 1 if segments else current["seq"]), **kwargs)
+        if replayed:
+            durable.checkpoint()
+        return durable
+
+    @staticmethod
+    def _apply(store: VectorStore, record: dict):
+        if record["op"] == "delete":
+            store.delete(record["ids"])
+        else:
+            getattr(store, record["op"])(
+                ids=record["ids"],
+                vectors=record["vectors"],
+                chunks=record["chunks"],
+                metadata=record["metadata"],
+            )
+
+    def add(self, vectors: np.ndarray, chunks: list, ids: list = None, metadata: list = None):
+        with self._lock:
+            if ids is None:
+                ids = list(range(self.store.next_id, self.store.next_id + len(chunks)))
+            ids = as_int_ids(ids)
+            record = WriteAheadLog.encode("add", ids, vectors, list(chunks), metadata)
+            self._log_and_apply(record, self.store.add, vectors, chunks, ids=ids, metadata=metadata)
+        self._maybe_checkpoint()
+
+    def upsert(self, ids: list, vectors: np.ndarray, chunks: list, metadata: list = None):
+        with self._lock:
+            ids = as_int_ids(ids)
+            record = WriteAheadLog.encode("upsert", ids, vectors, list(chunks), metadata)
+            self._log_and_apply(record, self.store.upsert, ids, vectors, chunks, metadata=metadata)
+        self._maybe_checkpoint()
+
+    def delete(self, ids: list) -> int:
+        with self._lock:
+            ids = as_int_ids(ids)
+            deleted = self._log_and_apply(WriteAheadLog.encode("delete", ids), self.store.delete, ids)
+        self._maybe_checkpoint()
+        return deleted
+
+    def _log_and_apply(self, record: bytes, apply, *args, **kwargs):
+        """
+        Logs record, then applies it to the store. A write the store rejects
+        is taken back out of the log, so replay never sees it.
+        """
+        offset = self.wal.append(record)
+        try:
+            result = apply(*args, **kwargs)
+        except Exception:
+            self.wal.undo(offset)
+            raise
+        self.wal.commit()
+        return result
+
+    def search(self, query_vec: np.ndarray, k: int = 3, **kwargs):
+        return self.store.search(query_vec, k, **kwargs)
+
+    def search_batch(self, query_vecs: np.ndarray, k: int = 3, **kwargs):
+        return self.store.search_batch(query_vecs, k, **kwargs)
+
+    def search_range(self, query_vec: np.ndarray, **kwargs):
+        return self.store.search_range(query_vec, **kwargs)
+
+    def __len__(self):
+        return len(self.store)
+
+    def sync(self):
+        """Forces logged records to disk."""
+        with self._lock:
+            self.wal.sync()
+
+    def _maybe_checkpoint(self):
+        self.records_since_snapshot += 1
+        if self.snapshot_every and self.records_since_snapshot >= self.snapshot_every:
+            if self._snapshot_thread is None or not self._snapshot_thread.is_alive():
+                self.checkpoint(background=True)
+
+    def checkpoint(self, background: bool = False):
+        """
+        Folds everything logged so far into a new snapshot. Only the log
+        rotation and the in-memory copy happen under the write lock; the
+        snapshot itself is written afterwards (in a thread if background).
+        """
+        self.wait_for_checkpoint()
+
+        with self._lock:
+            self.wal.close()
+            self.seq += 1
+            self.wal = WriteAheadLog(os.path.join(self.path, _segment_name(self.seq)), self.sync_every)
+            frozen = self.store.copy()
+            self.records_since_snapshot = 0
+            seq = self.seq
+
+        if background:
+            self._snapshot_thread = threading.Thread(
+                target=self._write_snapshot, args=(frozen, seq), daemon=True
+            )
+            self._snapshot_thread.start()
+        else:
+            self._write_snapshot(frozen, seq)
+
+    def _write_snapshot(self, store: VectorStore, seq: int):
+        store.save(os.path.join(self.path, _snapshot_name(seq)))
+
+        # Switching CURRENT is the commit point: an atomic rename
+        tmp = os.path.join(self.path, CURRENT_FILE + ".tmp")
+        with open(tmp, "w") as f:
+            json.dump({"snapshot": _snapshot_name(seq), "seq": seq}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, os.path.join(self.path, CURRENT_FILE))
+
+        # Older snapshots and the segments folded into this one are no longer needed
+        for old_seq, name in _numbered(self.path, SNAPSHOT_NAME).items():
+            if old_seq < seq:
+                shutil.rmtree(os.path.join(self.path, name))
+        for old_seq, name in _numbered(self.path, SEGMENT_NAME).items():
+            if old_seq < seq:
+                os.remove(os.path.join(self.path, name))
+
+        # Nor are temporary directories left behind by an interrupted save
+        for name in os.listdir(self.path):
+            if name.startswith("snapshot-") and not SNAPSHOT_NAME.match(name):
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def wait_for_checkpoint(self):
+        if self._snapshot_thread is not None:
+            self._snapshot_thread.join()
+            self._snapshot_thread = None
+
+    def close(self):
+        self.wait_for_checkpoint()
+        with self._lock:
+            self.wal.close()
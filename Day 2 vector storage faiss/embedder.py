@@ -1,19 +1,273 @@
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 from sentence_transformers import SentenceTransformer
 import numpy as np
 
+from embedding_cache import EmbeddingCache
+from model_registry import get_model
+from onnx_backend import load_onnx
+
 
 class Embedder:
     """
     Wraps a SentenceTransformer model and exposes a simple encode method.
+
+    With cache_dir set, vectors are cached on disk by (model name, normalization,
+    text), and texts already seen are served from the cache. Each model gets its
+    own subdirectory of cache_dir (and its own cache_max_bytes). The model itself
+    is only loaded once something actually needs encoding.
+
+    With token_budget set, inputs are sorted by token length and grouped into
+    batches of at most token_budget padded tokens, so short chunks are not
+    padded out to the length of a long one. Padding statistics for the last
+    call are kept in `last_padding`.
+
+    backend="onnx" runs the model through ONNX Runtime with dynamic int8
+    quantization instead of eager PyTorch (see onnx_backend.py).
+
+    precision="float16" halves the size of the returned arrays. int8 and
+    binary storage are handled by VectorStore, which owns their calibration.
     """
 
-    def __init__(self, model_name: str = "all-MiniLM-L6-v2"):
-        self.model = SentenceTransformer(model_name)
+    def __init__(self, model_name: str = "all-MiniLM-L6-v2", normalize: bool = False,
+                 cache_dir: str = None, cache_max_bytes: int = 1 << 30,
+                 token_budget: int = None, backend: str = "torch",
+                 precision: str = "float32"):
+        if backend not in ("torch", "onnx"):
+            raise ValueError(f"Unknown backend: {backend}")
+        if precision not in ("float32", "float16"):
+            raise ValueError(f"Unsupported output precision: {precision}")
+
+        self.model_name = model_name
+        self.backend = backend
+        self.precision = precision
+        self.normalize = normalize
+        self.token_budget = token_budget
+        self.last_padding = None
+        self.loader_kwargs = {}  # extra arguments for the model loader
+        self.cache = (
+            EmbeddingCache(os.path.join(cache_dir, self.cache_name.replace("/", "__")), cache_max_bytes)
+            if cache_dir else None
+        )
+
+    @property
+    def model(self) -> SentenceTransformer:
+        # Looked up in the registry on every use instead of kept here, so a
+        # model the registry evicts is actually freed
+        if self.backend == "onnx":
+            return get_model(self.model_name, loader=load_onnx, **self.loader_kwargs)
+        return get_model(self.model_name, **self.loader_kwargs)
+
+    @property
+    def cache_name(self) -> str:
+        # Quantized vectors differ slightly, so they are cached separately
+        return self.model_name if self.backend == "torch" else f"{self.model_name}@onnx-int8"
+
+    def _encode(self, texts):
+        if self.token_budget and texts:
+            return self._encode_bucketed(texts)
+
+        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=self.normalize)
+        return vectors.astype(np.float32)
+
+    def token_lengths(self, texts) -> np.ndarray:
+        """Token count of each text, as the model will see it (special tokens, truncation)."""
+        model = self.model
+        encoded = model.tokenizer(
+            texts,
+            add_special_tokens=True,
+            truncation=True,
+            max_length=model.max_seq_length,
+            return_attention_mask=False,
+            return_token_type_ids=False,
+        )
+        return np.array([len(ids) for ids in encoded["input_ids"]])
+
+    def _encode_bucketed(self, texts):
+        lengths = self.token_lengths(texts)
+        order = np.argsort(lengths, kind="stable")
+
+        # Walking in ascending length, the newest item is always the longest,
+        # so a bucket's padded size is len(bucket) * lengths[newest]
+        buckets = []
+        current = []
+        for i in order:
+            if current and (len(current) + 1) * lengths[i] > self.token_budget:
+                buckets.append(current)
+                current = []
+            current.append(i)
+        buckets.append(current)
+
+        model = self.model
+        vectors = None
+        for bucket in buckets:
+            out = model.encode(
+                [texts[i] for i in bucket],
+                batch_size=len(bucket),
+                convert_to_numpy=True,
+                normalize_embeddings=self.normalize,
+            )
+            if vectors is None:
+                vectors = np.empty((len(texts), out.shape[1]), dtype=np.float32)
+            vectors[bucket] = out
+
+        self.last_padding = {
+            "batches": len(buckets),
+            "tokens": int(lengths.sum()),
+            "padding_waste": padding_waste(lengths, buckets),
+            # What the same inputs would waste in input order, batches of 32
+            "input_order_waste": padding_waste(
+                lengths, [range(i, min(i + 32, len(texts))) for i in range(0, len(texts), 32)]
+            ),
+        }
+        return vectors
 
     def encode(self, texts):
         """
         Encodes a list of strings into vectors.
         Returns a numpy array of shape (n, dim).
         """
-        vectors = self.model.encode(texts, convert_to_numpy=True, normalize_embeddings=False)
-        return vectors.astype(np.float32)
+        return self._output(self._cached(texts, self._encode))
+
+    def _output(self, vectors: np.ndarray) -> np.ndarray:
+        return vectors.astype(np.float16) if self.precision == "float16" else vectors
+
+    def _cached(self, texts, encode_fn):
+        """
+        Runs encode_fn on the texts missing from the cache (or on all texts
+        if caching is off) and assembles the result in input order.
+        """
+        if self.cache is None or not texts:
+            return encode_fn(texts)
+
+        keys = [EmbeddingCache.key(self.cache_name, self.normalize, t) for t in texts]
+        hits = self.cache.get(keys)
+        misses = [i for i in range(len(texts)) if i not in hits]
+
+        if not misses:
+            return np.stack([hits[i] for i in range(len(texts))]).astype(np.float32)
+
+        encoded = encode_fn([texts[i] for i in misses])
+        self.cache.put([keys[i] for i in misses], encoded)
+
+        vectors = np.empty((len(texts), encoded.shape[1]), dtype=np.float32)
+        vectors[misses] = encoded
+        for i, vec in hits.items():
+            vectors[i] = vec
+        return vectors
+
+    def pool(self, workers: int = None, threads_per_worker: int = None,
+             shard_size: int = 256) -> "EmbeddingPool":
+        """
+        Creates a multi-process pool that encodes with this embedder's settings.
+        Use it as a context manager so worker startup is paid once per job:
+
+            with embedder.pool(workers=4) as pool:
+                vectors = pool.encode(chunks)
+        """
+        return EmbeddingPool(self, workers, threads_per_worker, shard_size)
+
+    def encode_parallel(self, texts, workers: int = None, threads_per_worker: int = None):
+        """
+        One-off parallel encode. Starts and stops a pool for this call only,
+        so prefer pool() when encoding several batches.
+        """
+        with self.pool(workers, threads_per_worker) as pool:
+            return pool.encode(texts)
+
+
+# Per-process embedder used by EmbeddingPool workers
+_worker_embedder = None
+
+
+def _init_worker(model_name, normalize, token_budget, backend, threads):
+    global _worker_embedder
+
+    # Cap intra-op threads so N workers don't oversubscribe the CPU. OpenMP
+    # reads its limit when first started, so it is set before anything loads.
+    os.environ["OMP_NUM_THREADS"] = str(threads)
+    import torch
+    torch.set_num_threads(threads)
+
+    _worker_embedder = Embedder(model_name, normalize=normalize, token_budget=token_budget,
+                                backend=backend)
+    if backend == "onnx":
+        # ONNX Runtime sizes its own thread pool per session, ignoring torch's setting
+        _worker_embedder.loader_kwargs = {"threads": threads}
+    _worker_embedder.model  # load now rather than on the first shard
+
+
+def _encode_shard(texts):
+    return _worker_embedder._encode(texts)
+
+
+class EmbeddingPool:
+    """
+    N worker processes, each holding its own copy of the model with a capped
+    thread count (torch threads, or the ONNX Runtime session's). Inputs are split into shards that are encoded in
+    parallel and reassembled in order. The parent embedder's cache, if any,
+    is consulted first so only misses are sent to the workers.
+    """
+
+    def __init__(self, embedder: Embedder, workers: int = None,
+                 threads_per_worker: int = None, shard_size: int = 256):
+        self.embedder = embedder
+        self.workers = workers or os.cpu_count() or 1
+        self.threads_per_worker = threads_per_worker or max((os.cpu_count() or 1) // self.workers, 1)
+        self.shard_size = shard_size
+        self.executor = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def start(self):
+        if self.executor is None:
+            # spawn, not fork: forking a process that already initialized torch is unsafe
+            self.executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+                initializer=_init_worker,
+                initargs=(
+                    self.embedder.model_name,
+                    self.embedder.normalize,
+                    self.embedder.token_budget,
+                    self.embedder.backend,
+                    self.threads_per_worker,
+                ),
+            )
+
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+
+    def _encode_sharded(self, texts):
+        if self.executor is None:
+            raise RuntimeError("Pool is not running; use it as a context manager or call start()")
+
+        shards = [texts[i:i + self.shard_size] for i in range(0, len(texts), self.shard_size)]
+        return np.concatenate(list(self.executor.map(_encode_shard, shards))).astype(np.float32)
+
+    def encode(self, texts):
+        """
+        Encodes a list of strings across the worker processes.
+        Returns a numpy array of shape (n, dim), in input order.
+        """
+        if not texts:
+            return self.embedder.encode(texts)
+        return self.embedder._output(self.embedder._cached(texts, self._encode_sharded))
+
+
+def padding_waste(lengths: np.ndarray, batches) -> float:
+    """
+    Fraction of padded token positions that are padding,
+    when each batch is padded to its longest member.
+    """
+    padded = sum(len(b) * max(lengths[i] for i in b) for b in batches if len(b))
+    return 1.0 - float(lengths.sum()) / float(padded) if padded else 0.0
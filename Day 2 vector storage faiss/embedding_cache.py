@@ -0,0 +1,197 @@
+import hashlib
+import os
+import sqlite3
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    On-disk, content-addressed cache of embedding vectors.
+
+    Keys are hashes of (model name, normalization flag, text). The key -> slot
+    mapping lives in SQLite, and the vectors themselves in a memory-mapped
+    float32 array with one row per slot. When the array would grow beyond
+    max_bytes, the least recently used entries are evicted and their slots reused.
+    All vectors in one cache share a dimension, so each model needs its own path.
+    """
+
+    GROW_ROWS = 4096
+
+    def __init__(self, path: str, max_bytes: int = 1 << 30):
+        os.makedirs(path, exist_ok=True)
+        self.path = path
+        self.max_bytes = max_bytes
+        self.vectors_path = os.path.join(path, "vectors.f32")
+
+        self.db = sqlite3.connect(os.path.join(path, "index.sqlite"))
+        self.db.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                key BLOB PRIMARY KEY,
+                slot INTEGER NOT NULL,
+                last_used INTEGER NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS entries_lru ON entries (last_used);
+            CREATE TABLE IF NOT EXISTS meta (name TEXT PRIMARY KEY, value INTEGER);
+            """
+        )
+
+        self.dim = self._meta("dim")
+        self.clock = self._meta("clock") or 0
+        self.vectors = None
+        if self.dim:
+            self._open_vectors()
+
+    @staticmethod
+    def key(model_name: str, normalize: bool, text: str) -> bytes:
+        h = hashlib.blake2b(digest_size=16)
+        h.update(f"{model_name}\0{int(normalize)}\0".encode("utf-8"))
+        h.update(text.encode("utf-8"))
+        return h.digest()
+
+    def _meta(self, name):
+        row = self.db.execute("SELECT value FROM meta WHERE name = ?", (name,)).fetchone()
+        return row[0] if row else None
+
+    def _set_meta(self, name, value):
+        self.db.execute("INSERT OR REPLACE INTO meta (name, value) VALUES (?, ?)", (name, value))
+
+    @property
+    def capacity(self) -> int:
+        """Maximum number of vectors that fit in max_bytes."""
+        return max(self.max_bytes // (self.dim * 4), 1)
+
+    def _rows(self) -> int:
+        return os.path.getsize(self.vectors_path) // (self.dim * 4)
+
+    def _open_vectors(self):
+        if not os.path.exists(self.vectors_path):
+            open(self.vectors_path, "wb").close()
+        rows = self._rows()
+        self.vectors = (
+            np.memmap(self.vectors_path, dtype=np.float32, mode="r+", shape=(rows, self.dim))
+            if rows else None
+        )
+
+    def _grow(self, rows_needed: int):
+        rows = max(rows_needed, min(self._rows() + self.GROW_ROWS, self.capacity))
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        with open(self.vectors_path, "r+b") as f:
+            f.truncate(rows * self.dim * 4)
+        self._open_vectors()
+
+    def _slots(self, keys) -> dict:
+        """Maps each stored key in keys to its slot, querying in batches."""
+        slots = {}
+        for start in range(0, len(keys), 500):
+            batch = keys[start:start + 500]
+            rows = self.db.execute(
+                f"SELECT key, slot FROM entries WHERE key IN ({','.join('?' * len(batch))})",
+                batch,
+            ).fetchall()
+            slots.update(rows)
+        return slots
+
+    def get(self, keys):
+        """
+        Looks up a list of keys.
+        Returns a dict {position in keys: vector} for the hits.
+        """
+        if not keys or self.vectors is None:
+            return {}
+
+        slots = self._slots(keys)
+
+        if not slots:
+            return {}
+
+        # Touch hits for LRU ordering
+        self.clock += 1
+        self.db.executemany(
+            "UPDATE entries SET last_used = ? WHERE key = ?",
+            [(self.clock, k) for k in slots],
+        )
+        self._set_meta("clock", self.clock)
+        self.db.commit()
+
+        return {
+            i: np.array(self.vectors[slots[k]])
+            for i, k in enumerate(keys)
+            if k in slots
+        }
+
+    def put(self, keys, vectors: np.ndarray):
+        """
+        Stores vectors under their keys, evicting least recently used entries if full.
+        """
+        if not keys:
+            return
+
+        if self.dim is None:
+            self.dim = int(vectors.shape[1])
+            self._set_meta("dim", self.dim)
+            self._open_vectors()
+        elif vectors.shape[1] != self.dim:
+            raise ValueError(f"Cache holds {self.dim}-dim vectors, got {vectors.shape[1]}")
+
+        # Keep only the last occurrence of each key, and at most `capacity` of them
+        unique = dict(zip(keys, range(len(keys))))
+        items = list(unique.items())[-self.capacity:]
+
+        existing = self._slots([k for k, _ in items])
+        writing = {k for k, _ in items}
+
+        new_keys = [k for k, _ in items if k not in existing]
+        # Slots are handed out densely, so fresh ones continue after the
+        # highest in use until the capacity is reached
+        next_slot = self.db.execute("SELECT COALESCE(MAX(slot) + 1, 0) FROM entries").fetchone()[0]
+        fresh = max(self.capacity - next_slot, 0)
+
+        reusable = []
+        if len(new_keys) > fresh:
+            # Evict least recently used entries, except ones being written now,
+            # and hand their slots to the new keys
+            needed = len(new_keys) - fresh
+            evicted = self.db.execute(
+                "SELECT key, slot FROM entries ORDER BY last_used LIMIT ?",
+                (needed + len(existing),),
+            ).fetchall()
+            evicted = [(k, s) for k, s in evicted if k not in writing][:needed]
+            self.db.executemany("DELETE FROM entries WHERE key = ?", [(k,) for k, _ in evicted])
+            reusable = [s for _, s in evicted]
+
+        slots = dict(existing)
+        for k in new_keys:
+            if reusable:
+                slots[k] = reusable.pop()
+            else:
+                slots[k] = next_slot
+                next_slot += 1
+
+        top = max(slots.values()) + 1
+        if self.vectors is None or top > len(self.vectors):
+            self._grow(top)
+
+        self.clock += 1
+        for k, i in items:
+            self.vectors[slots[k]] = vectors[i]
+        self.vectors.flush()
+
+        self.db.executemany(
+            "INSERT OR REPLACE INTO entries (key, slot, last_used) VALUES (?, ?, ?)",
+            [(k, slots[k], self.clock) for k, _ in items],
+        )
+        self._set_meta("clock", self.clock)
+        self.db.commit()
+
+    def __len__(self):
+        return self.db.execute("SELECT COUNT(*) FROM entries").fetchone()[0]
+
+    def close(self):
+        if self.vectors is not None:
+            self.vectors.flush()
+            self.vectors = None
+        self.db.close()
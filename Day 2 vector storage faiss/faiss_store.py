@@ -1,45 +1,883 @@
+import json
+import os
+import shutil
+import threading
+from contextlib import contextmanager
+
 import faiss
 import numpy as np
 
+from metadata_filter import Column, filter_mask
+
+
+# FAISS index used for each storage precision (binary is handled separately)
+PRECISION_FACTORY = {
+    "float32": "Flat",
+    "float16": "SQfp16",
+    "int8": "SQ8",
+}
+PRECISIONS = tuple(PRECISION_FACTORY) + ("binary",)
+
+REDUCTIONS = ("pca", "truncate")
+
+INDEX_TYPES = ("flat", "hnsw", "ivf", "ivfpq")
+
+# "cosine" is inner product over vectors normalized at add / query time
+METRICS = ("l2", "ip", "cosine")
+
+# Files inside a saved store directory
+MANIFEST_FILE = "manifest.json"
+INDEX_FILE = "index.faiss"
+REDUCER_FILE = "reducer.faiss"
+TEXTS_FILE = "texts.bin"
+OFFSETS_FILE = "texts.offsets.npy"
+IDS_FILE = "ids.npy"
+DELETED_FILE = "deleted.npy"
+METADATA_FILE = "metadata.json"
+STORE_FORMAT = 2
+
+# Filter masks kept per store until the next write
+FILTER_CACHE_SIZE = 64
+
+# On hnsw / ivf stores the selector only applies along the graph walk or in
+# the probed lists, so filters matching at most this many rows are searched
+# exactly instead (all lists probed, or the matching HNSW rows brute-forced)
+FILTER_EXACT_ROWS = 20_000
+
+
+def as_int_ids(ids) -> list:
+    """External ids as plain Python ints (numpy integers included); rejects anything else."""
+    converted = []
+    for id_ in ids:
+        if isinstance(id_, (bool, np.bool_)) or not isinstance(id_, (int, np.integer)):
+            raise ValueError(f"Ids must be integers, got {id_!r}")
+        converted.append(int(id_))
+    return converted
+
+
+def to_binary(vectors: np.ndarray) -> np.ndarray:
+    """Packs each vector into sign bits (1 where the component is positive)."""
+    return np.packbits(vectors > 0, axis=1)
+
+
+class ReadWriteLock:
+    """
+    Lets any number of readers in at once, or a single writer. Waiting
+    writers go first, so a steady stream of readers can't starve them.
+    """
+
+    def __init__(self):
+        self._cond = threading.Condition()
+        self._readers = 0
+        self._writing = False
+        self._writers_waiting = 0
+
+    @contextmanager
+    def read(self):
+        with self._cond:
+            while self._writing or self._writers_waiting:
+                self._cond.wait()
+            self._readers += 1
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._readers -= 1
+                if not self._readers:
+                    self._cond.notify_all()
+
+    @contextmanager
+    def write(self):
+        with self._cond:
+            self._writers_waiting += 1
+            while self._writing or self._readers:
+                self._cond.wait()
+            self._writers_waiting -= 1
+            self._writing = True
+        try:
+            yield
+        finally:
+            with self._cond:
+                self._writing = False
+                self._cond.notify_all()
+
+
+class TextBlob:
+    """
+    Chunk texts stored as one UTF-8 blob plus an array of n + 1 byte offsets.
+    Opened with mmap=True, both files stay on disk and a text is only decoded
+    when it is looked up, so huge stores cost almost nothing to open.
+    """
+
+    def __init__(self, blob, offsets):
+        self.blob = blob
+        self.offsets = offsets
+
+    @staticmethod
+    def write(directory: str, texts):
+        encoded = [str(text).encode("utf-8") for text in texts]
+        offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+        np.cumsum([len(b) for b in encoded], out=offsets[1:])
+
+        with open(os.path.join(directory, TEXTS_FILE), "wb") as f:
+            for b in encoded:
+                f.write(b)
+        np.save(os.path.join(directory, OFFSETS_FILE), offsets)
+
+    @classmethod
+    def open(cls, directory: str, mmap: bool = False) -> "TextBlob":
+        offsets = np.load(os.path.join(directory, OFFSETS_FILE), mmap_mode="r" if mmap else None)
+        path = os.path.join(directory, TEXTS_FILE)
+
+        if mmap and offsets[-1] > 0:
+            blob = np.memmap(path, dtype=np.uint8, mode="r")
+        else:
+            # np.memmap refuses empty files, so tiny stores are just read
+            with open(path, "rb") as f:
+                blob = np.frombuffer(f.read(), dtype=np.uint8)
+        return cls(blob, offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        if not -len(self) <= i < len(self):
+            raise IndexError("chunk index out of range")
+        i %= len(self)
+        return self.blob[self.offsets[i]:self.offsets[i + 1]].tobytes().decode("utf-8")
+
+    def __iter__(self):
+        for i in range(len(self)):
+            yield self[i]
+
 
 class VectorStore:
     """
-    Minimal wrapper around a FAISS IndexFlatL2 index.
+    FAISS index of text chunks with integer ids, metadata filters and persistence.
     Encapsulates adding vectors, searching, and serialization.
     """
 
-    def __init__(self, dim: int):
+    def __init__(self, dim: int, precision: str = "float32", rescore: int = 4,
+                 reduce_to: int = None, reduction: str = "pca",
+                 index_type: str = "flat", nlist: int = 1024, nprobe: int = 8,
+                 hnsw_m: int = 32, ef_search: int = 64, pq_m: int = 16,
+                 compact_threshold: float = 0.2, metric: str = "l2"):
+        """
+        index_type: "flat" (exact), "hnsw" (hnsw_m links per node, ef_search
+        at query time), "ivf" (nlist clusters, nprobe scanned per query) or
+        "ivfpq" (IVF with pq_m-byte product-quantized codes, float32 only).
+        precision: "float32", "float16", "int8" (scalar quantizer) or "binary"
+        (1 bit per dimension, top k * rescore candidates re-ranked).
+        metric: "l2", "ip" or "cosine"; the last two make searches return
+        scores, highest first.
+        reduce_to: shrink vectors by "pca" or "truncate" (Matryoshka models).
+        compact_threshold: dead-row ratio above which deletes trigger compact().
+        """
+        if precision not in PRECISIONS:
+            raise ValueError(f"Unknown precision: {precision}")
+        if reduction not in REDUCTIONS:
+            raise ValueError(f"Unknown reduction: {reduction}")
+        if index_type not in INDEX_TYPES:
+            raise ValueError(f"Unknown index type: {index_type}")
+        if metric not in METRICS:
+            raise ValueError(f"Unknown metric: {metric}")
+        if reduce_to is not None and not 0 < reduce_to <= dim:
+            raise ValueError("reduce_to must be between 1 and dim")
+
         self.dim = dim
-        self.index = faiss.IndexFlatL2(dim)
+        self.precision = precision
+        self.rescore = rescore
+        self.reduce_to = reduce_to
+        self.reduction = reduction
+        self.index_type = index_type
+        self.nlist = nlist
+        self.nprobe = nprobe
+        self.hnsw_m = hnsw_m
+        self.ef_search = ef_search
+        self.pq_m = pq_m
+        self.compact_threshold = compact_threshold
+        self.metric = metric
+
+        if precision == "binary" and self.index_dim % 8:
+            raise ValueError("Binary precision needs a dimension divisible by 8")
+        if precision == "binary" and index_type != "flat":
+            raise ValueError("Binary precision only supports the flat index")
+        if index_type == "ivfpq" and precision != "float32":
+            raise ValueError("ivfpq compresses vectors itself; use precision='float32'")
+        if index_type == "ivfpq" and self.index_dim % pq_m:
+            raise ValueError("ivfpq needs a dimension divisible by pq_m")
+
+        self.reducer = self._new_reducer()
+        self.index = self._new_index()
         self.data = []  # stores the original text chunks
+        self.read_only = False
+
+        # External ids, row by row, and the reverse lookup for live rows
+        self.ids = []
+        self._rows = {}
+        self.next_id = 0
+        self.tombstones = set()
+        self._selector = None
 
-    def add(self, vectors: np.ndarray, chunks: list):
+        # Metadata columns, one Column per field, aligned with rows
+        self.metadata = {}
+        self._filter_masks = {}
+
+        # Writers (add / upsert / delete / compact) hold _write_lock for the
+        # whole operation, and _state_lock's write side only while they change
+        # the index, rows or metadata. Searches hold its read side, so each
+        # one sees a single consistent state.
+        self._write_lock = threading.RLock()
+        self._state_lock = ReadWriteLock()
+        self._compaction = None
+
+    @property
+    def index_dim(self) -> int:
+        """Dimension of the vectors actually stored in the index."""
+        return self.reduce_to or self.dim
+
+    def _new_reducer(self):
+        if self.reduce_to is None:
+            return None
+        if self.reduction == "pca":
+            return faiss.PCAMatrix(self.dim, self.reduce_to)
+        return faiss.RemapDimensionsTransform(self.dim, self.reduce_to, False)
+
+    def factory_string(self) -> str:
+        """The faiss.index_factory description of the configured index."""
+        storage = PRECISION_FACTORY[self.precision]
+        if self.index_type == "hnsw":
+            return f"HNSW{self.hnsw_m}" if storage == "Flat" else f"HNSW{self.hnsw_m},{storage}"
+        if self.index_type == "ivf":
+            return f"IVF{self.nlist},{storage}"
+        if self.index_type == "ivfpq":
+            return f"IVF{self.nlist},PQ{self.pq_m}"
+        return storage
+
+    @property
+    def similarity(self) -> bool:
+        """True when search returns scores (higher is better) rather than distances."""
+        return self.metric != "l2"
+
+    def _new_index(self):
+        if self.precision == "binary":
+            return faiss.IndexBinaryFlat(self.index_dim)
+        if self.index_type == "flat" and self.precision == "float32":
+            return faiss.IndexFlatIP(self.index_dim) if self.similarity else faiss.IndexFlatL2(self.index_dim)
+        metric = faiss.METRIC_INNER_PRODUCT if self.similarity else faiss.METRIC_L2
+        return faiss.index_factory(self.index_dim, self.factory_string(), metric)
+
+    def _prepare(self, vectors: np.ndarray) -> np.ndarray:
+        """
+        Converts input vectors to what the index stores: float32, reduced if
+        configured, and unit length for cosine.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+        if self.reducer is not None:
+            vectors = self.reducer.apply(vectors)
+        if self.metric == "cosine":
+            # normalize_L2 works in place, so never on the caller's array
+            vectors = vectors.copy() if self.reducer is None else vectors
+            faiss.normalize_L2(vectors)
+        return vectors
+
+    @property
+    def is_trained(self) -> bool:
+        """False until train() has fitted what this configuration needs (PCA, int8, IVF)."""
+        if self.reducer is not None and not self.reducer.is_trained:
+            return False
+        return self.precision == "binary" or self.index.is_trained
+
+    def train(self, vectors: np.ndarray):
+        """
+        Trains the reduction and the index on a representative sample
+        (PCA fits its projection; int8 sets the quantizer's calibration range;
+        IVF clusters the vectors). Must be called before the first add for
+        those configurations; it does nothing once the store is trained.
+        """
+        vectors = np.ascontiguousarray(vectors, dtype=np.float32)
+
+        if self.reducer is not None and not self.reducer.is_trained and len(vectors) < self.reduce_to:
+            raise ValueError(
+                f"PCA to {self.reduce_to} dimensions needs at least {self.reduce_to} training "
+                f"vectors, got {len(vectors)}; train on a larger sample or lower reduce_to"
+            )
+        if not self.index.is_trained and self.index_type in ("ivf", "ivfpq"):
+            # k-means needs at least one vector per centroid: nlist coarse
+            # centroids, and 256 per PQ sub-quantizer
+            needed = max(self.nlist, 256) if self.index_type == "ivfpq" else self.nlist
+            if len(vectors) < needed:
+                raise ValueError(
+                    f"{self.factory_string()} needs at least {needed} training vectors, "
+                    f"got {len(vectors)}; train on a larger sample"
+                    + (" or lower nlist" if needed == self.nlist else "")
+                )
+
+        if self.reducer is not None and not self.reducer.is_trained:
+            self.reducer.train(vectors)
+
+        if self.precision != "binary" and not self.index.is_trained:
+            self.index.train(self._prepare(vectors))
+
+    def add(self, vectors: np.ndarray, chunks: list, ids: list = None, metadata: list = None):
         """
         Adds vectors and stores their associated text.
         The number of vectors must match the number of chunks.
+        ids are optional integer ids; they must not already be in the store.
+        metadata is an optional list with one dict per chunk.
+        """
+        if ids is not None:
+            ids = as_int_ids(ids)
+        self._check_writable(vectors, chunks, ids, metadata)
+
+        with self._write_lock:
+            if ids is None:
+                ids = list(range(self.next_id, self.next_id + len(chunks)))
+            if any(i in self._row_map() for i in ids):
+                raise ValueError("Id already in the store; use upsert() to replace it")
+            self._append(vectors, chunks, ids, metadata)
+
+    def upsert(self, ids: list, vectors: np.ndarray, chunks: list, metadata: list = None):
+        """
+        Inserts chunks, replacing any existing chunk with the same id.
+        The old rows become tombstones.
+        """
+        ids = as_int_ids(ids)
+        self._check_writable(vectors, chunks, ids, metadata)
+
+        with self._write_lock:
+            self._tombstone(ids)
+            self._append(vectors, chunks, ids, metadata)
+        self._maybe_compact()
+
+    def delete(self, ids: list) -> int:
         """
+        Deletes chunks by id. Unknown ids are ignored.
+        Rows are only marked as tombstones, which searches skip; compact()
+        drops them once compact_threshold is exceeded.
+        Returns the number of chunks deleted.
+        """
+        if self.read_only:
+            raise RuntimeError("Store was loaded with mmap=True and is read-only")
+
+        with self._write_lock:
+            deleted = self._tombstone(ids)
+        self._maybe_compact()
+        return deleted
+
+    def _check_writable(self, vectors, chunks, ids, metadata=None):
         if vectors.shape[0] != len(chunks):
             raise ValueError("Vector count must match chunk count")
+        if ids is not None and len(ids) != len(chunks):
+            raise ValueError("Id count must match chunk count")
+        if ids is not None and len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in one call")
+        if metadata is not None and len(metadata) != len(chunks):
+            raise ValueError("Metadata count must match chunk count")
+        if self.read_only:
+            raise RuntimeError("Store was loaded with mmap=True and is read-only")
+        if not self.is_trained:
+            raise ValueError(
+                "This store fits its PCA / int8 / IVF parameters to the data; "
+                "call train() on a representative sample before adding"
+            )
+
+    def _append(self, vectors, chunks, ids, metadata=None):
+        vectors = self._prepare(vectors)
+        if self.precision == "binary":
+            vectors = to_binary(vectors)
+
+        with self._state_lock.write():
+            self.index.add(vectors)
+
+            first_row = len(self.ids)
+            self._append_metadata(first_row, len(chunks), metadata)
+            self.data.extend(chunks)
+            self.ids.extend(ids)
+            self._row_map().update((id_, first_row + i) for i, id_ in enumerate(ids))
+            self.next_id = max([self.next_id] + [i + 1 for i in ids])
+            self._selector = None  # the tombstone bitmap must cover the new rows
+            self._filter_masks = {}
+
+    def _append_metadata(self, first_row: int, count: int, metadata):
+        fields = set(self.metadata)
+        if metadata is not None:
+            fields.update(key for meta in metadata for key in meta)
+
+        for field in fields:
+            column = self.metadata.get(field)
+            if column is None:
+                # Earlier rows don't have the field, so every column stays row-aligned
+                column = self.metadata[field] = Column()
+                column.extend_missing(first_row)
+            if metadata is None:
+                column.extend_missing(count)
+            else:
+                column.extend([meta.get(field) for meta in metadata])
+
+    def _tombstone(self, ids) -> int:
+        deleted = 0
+        with self._state_lock.write():
+            for id_ in ids:
+                row = self._row_map().pop(id_, None)
+                if row is not None:
+                    self.tombstones.add(row)
+                    deleted += 1
+            if deleted:
+                self._selector = None
+                self._filter_masks = {}
+        return deleted
+
+    def _row_map(self) -> dict:
+        """id -> row of every live chunk, built on first use after a load."""
+        if self._rows is None:
+            ids = self.ids.tolist() if isinstance(self.ids, np.ndarray) else self.ids
+            self._rows = {id_: row for row, id_ in enumerate(ids) if row not in self.tombstones}
+        return self._rows
+
+    def __len__(self):
+        return len(self.ids) - len(self.tombstones)
+
+    def __contains__(self, id_):
+        return id_ in self._row_map()
+
+    def tombstone_ratio(self) -> float:
+        return len(self.tombstones) / len(self.ids) if len(self.ids) else 0.0
+
+    def _maybe_compact(self):
+        if self.compact_threshold is None or self.tombstone_ratio() <= self.compact_threshold:
+            return
+        if self._compaction is not None and self._compaction.is_alive():
+            return
+        self._compaction = threading.Thread(target=self.compact, daemon=True)
+        self._compaction.start()
 
-        self.index.add(vectors.astype(np.float32))
-        self.data.extend(chunks)
+    def wait_for_compaction(self):
+        if self._compaction is not None:
+            self._compaction.join()
 
-    def search(self, query_vec: np.ndarray, k: int = 3):
+    def compact(self):
+        """
+        Rebuilds the index without tombstoned rows and swaps it in.
+        Writers wait while this runs; searches keep using the old index
+        until the swap.
+        """
+        with self._write_lock:
+            if not self.tombstones:
+                return
+
+            alive = self._alive_mask()
+            index = self._compacted_index(alive)
+            rows = np.flatnonzero(alive)
+            data = [self.data[r] for r in rows]
+            ids = [self.ids[r] for r in rows]
+            metadata = {field: column.take(rows) for field, column in self.metadata.items()}
+            row_map = {id_: row for row, id_ in enumerate(ids)}
+
+            with self._state_lock.write():
+                self.index = index
+                self.data = data
+                self.ids = ids
+                self.metadata = metadata
+                self._rows = row_map
+                self.tombstones = set()
+                self._selector = None
+                self._filter_masks = {}
+
+    def _alive_mask(self) -> np.ndarray:
+        alive = np.ones(len(self.ids), dtype=bool)
+        alive[list(self.tombstones)] = False
+        return alive
+
+    def _compacted_index(self, alive: np.ndarray):
+        if self.index_type == "hnsw":
+            # HNSW graphs cannot drop nodes, so the graph is rebuilt from the stored vectors
+            vectors = self.index.reconstruct_n(0, self.index.ntotal)[alive]
+            index = faiss.clone_index(self.index)
+            index.reset()
+            index.add(vectors)
+            return index
+
+        if self.precision == "binary":
+            index = faiss.clone_binary_index(self.index)
+        else:
+            index = faiss.clone_index(self.index)
+        index.remove_ids(faiss.IDSelectorBatch(np.flatnonzero(~alive).astype(np.int64)))
+
+        if self.index_type in ("ivf", "ivfpq"):
+            # Flat indexes renumber rows on removal; IVF keeps the old labels, so remap them
+            new_rows = np.cumsum(alive) - 1
+            invlists = index.invlists
+            for list_no in range(index.nlist):
+                n = invlists.list_size(list_no)
+                if n:
+                    labels = faiss.rev_swig_ptr(invlists.get_ids(list_no), n)
+                    labels = np.ascontiguousarray(new_rows[labels], dtype=np.int64)
+                    invlists.update_entries(list_no, 0, n, faiss.swig_ptr(labels),
+                                            invlists.get_codes(list_no))
+        return index
+
+    def search(self, query_vec: np.ndarray, k: int = 3, nprobe: int = None, ef_search: int = None,
+               filters: dict = None):
         """
         Searches for the k nearest neighbors of the query vector.
-        Returns a list of (chunk_text, distance).
+        Returns a list of (chunk_text, distance), or (chunk_text, score) for
+        "ip" / "cosine" stores.
+        nprobe (IVF) and ef_search (HNSW) override the store's defaults for this query.
+        filters is a Haystack-style filter (see metadata_filter.py); only
+        chunks whose metadata matches compete for the top k.
         """
-        distances, indices = self.index.search(query_vec.astype(np.float32), k)
+        query_vec = np.atleast_2d(query_vec)[:1]
+        return self.search_batch(query_vec, k, nprobe=nprobe, ef_search=ef_search, filters=filters)[0]
 
-        results = []
-        for i, d in zip(indices[0], distances[0]):
-            if i < len(self.data):
-                results.append((self.data[i], float(d)))
+    def search_batch(self, query_vecs: np.ndarray, k: int = 3, nprobe: int = None,
+                     ef_search: int = None, batch_size: int = 1024, filters: dict = None):
+        """
+        Searches for all queries at once, one FAISS call per batch_size queries
+        (batching bounds the memory of the (n, k) result arrays).
+        Returns one list of (chunk_text, distance) per query, in query order.
+        """
+        query_vecs = np.atleast_2d(query_vecs)
+
+        with self._state_lock.read():
+            bitmap, selector, rows = self._selector_for(filters)
+            if filters and selector is None:
+                return [[] for _ in query_vecs]
+
+            if rows is not None and self.index_type in ("ivf", "ivfpq"):
+                nprobe = self.nlist
+            params = self._search_params(nprobe, ef_search, selector)
+
+            results = []
+            for start in range(0, len(query_vecs), batch_size):
+                batch = self._prepare(query_vecs[start:start + batch_size])
+
+                if rows is not None and self.index_type == "hnsw":
+                    distances, indices = self._search_rows(batch, k, rows)
+                elif self.precision == "binary":
+                    indices, distances = self._search_binary(self.index, batch, k, params)
+                else:
+                    distances, indices = self.index.search(batch, k, params=params)
+
+                for row_indices, row_distances in zip(indices, distances):
+                    results.append(self._results(self.data, row_indices, row_distances))
 
         return results
 
+    def search_range(self, query_vec: np.ndarray, min_score: float = None,
+                     max_distance: float = None, nprobe: int = None, ef_search: int = None,
+                     filters: dict = None):
+        """
+        Returns every chunk closer to the query than a threshold, best first,
+        using FAISS range search: min_score for "ip" / "cosine" stores,
+        max_distance (squared L2, like search) for "l2" stores.
+        """
+        if self.precision == "binary":
+            raise ValueError("Range search is not supported for binary precision")
+        radius = min_score if self.similarity else max_distance
+        if radius is None:
+            raise ValueError("Pass min_score for ip/cosine stores, max_distance for l2 stores")
+
+        query_vec = self._prepare(np.atleast_2d(query_vec)[:1])
+
+        with self._state_lock.read():
+            bitmap, selector, rows = self._selector_for(filters)
+            if filters and selector is None:
+                return []
+
+            if rows is not None and self.index_type in ("ivf", "ivfpq"):
+                nprobe = self.nlist
+            params = self._search_params(nprobe, ef_search, selector)
+            _, scores, indices = self.index.range_search(query_vec, radius, params=params)
+
+            order = np.argsort(-scores if self.similarity else scores, kind="stable")
+            return self._results(self.data, indices[order], scores[order])
+
+    def _selector_for(self, filters: dict = None):
+        """
+        (bitmap, selector, rows) of the rows a search may return; call with
+        the state lock held. The selector is None when nothing needs excluding,
+        or when filters match no rows. rows lists the matching rows when a
+        filter is selective enough to be searched exactly (see FILTER_EXACT_ROWS).
+        """
+        if filters:
+            return self._filter_selector(filters)
+        return self._tombstone_selector() + (None,)
+
+    @staticmethod
+    def _results(data, indices, distances):
+        results = []
+        for i, d in zip(indices, distances):
+            if 0 <= i < len(data):
+                results.append((data[i], float(d)))
+        return results
+
+    def _tombstone_selector(self):
+        """(bitmap, IDSelectorBitmap) of live rows, or (None, None) without tombstones."""
+        if not self.tombstones:
+            return None, None
+        if self._selector is None:
+            # The selector only points at the bitmap, so both are kept together
+            bitmap = np.packbits(self._alive_mask(), bitorder="little")
+            self._selector = (bitmap, faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)))
+        return self._selector
+
+    def _filter_selector(self, filters: dict):
+        """
+        (bitmap, IDSelectorBitmap, rows) of live rows matching filters, or
+        (None, None, None) if none match. rows is only set for approximate
+        indexes when few enough rows match to search them exactly. Kept per
+        filter until the next write.
+        """
+        key = json.dumps(filters, sort_keys=True, default=repr)
+        cached = self._filter_masks.get(key)
+        if cached is not None:
+            return cached
+
+        mask = filter_mask(filters, self.metadata, len(self.ids))
+        if self.tombstones:
+            mask &= self._alive_mask()
+        rows = np.flatnonzero(mask)
+        if len(rows):
+            bitmap = np.packbits(mask, bitorder="little")
+            exact = self.index_type != "flat" and len(rows) <= FILTER_EXACT_ROWS
+            cached = (bitmap, faiss.IDSelectorBitmap(len(bitmap), faiss.swig_ptr(bitmap)),
+                      rows if exact else None)
+        else:
+            cached = (None, None, None)
+
+        if len(self._filter_masks) >= FILTER_CACHE_SIZE:
+            self._filter_masks = {}
+        self._filter_masks[key] = cached
+        return cached
+
+    def _search_rows(self, query_vecs: np.ndarray, k: int, rows: np.ndarray):
+        """
+        Brute-force search over the given rows, reconstructed from the index.
+        Returns (distances, indices) like index.search.
+        """
+        metric = faiss.METRIC_INNER_PRODUCT if self.similarity else faiss.METRIC_L2
+        distances, indices = faiss.knn(query_vecs, self.index.reconstruct_batch(rows), k, metric=metric)
+        return distances, np.where(indices >= 0, rows[indices], -1)
+
+    def _search_params(self, nprobe: int = None, ef_search: int = None, selector=None):
+        if self.index_type == "hnsw":
+            return faiss.SearchParametersHNSW(efSearch=ef_search or self.ef_search, sel=selector)
+        if self.index_type in ("ivf", "ivfpq"):
+            return faiss.SearchParametersIVF(nprobe=nprobe or self.nprobe, sel=selector)
+        if selector is not None:
+            return faiss.SearchParameters(sel=selector)
+        return None
+
+    def _search_binary(self, index, query_vecs: np.ndarray, k: int, params=None):
+        """
+        Hamming search, then the k * rescore candidates re-ranked by the inner
+        product of the float query with their ±1 codes. Distances are the
+        negated scores, so lower is still better.
+        """
+        # Stage 1: Hamming search over packed codes, for the whole batch
+        _, candidates = index.search(to_binary(query_vecs), k * self.rescore, params=params)
+
+        indices, distances = [], []
+        for query, row in zip(query_vecs, candidates):
+            row = row[row >= 0]
+            if len(row) == 0:
+                indices.append(row)
+                distances.append(np.empty(0, dtype=np.float32))
+                continue
+
+            # Stage 2: rescore candidates with the float query against their ±1 codes
+            codes = np.stack([index.reconstruct(int(i)) for i in row])
+            signs = np.unpackbits(codes, axis=1)[:, :self.index_dim].astype(np.float32) * 2 - 1
+            scores = signs @ query
+
+            order = np.argsort(-scores)[:k]
+            indices.append(row[order])
+            distances.append(scores[order] if self.similarity else -scores[order])
+
+        return indices, distances
+
+    def copy(self) -> "VectorStore":
+        """
+        Independent copy of the store, e.g. to save a snapshot while writes continue.
+        The index is cloned; the trained reducer is shared, since it never changes.
+        """
+        with self._write_lock:
+            other = VectorStore(**self.config())
+            if self.precision == "binary":
+                other.index = faiss.clone_binary_index(self.index)
+            else:
+                other.index = faiss.clone_index(self.index)
+            other.reducer = self.reducer
+            other.data = list(self.data)
+            other.ids = self.ids.tolist() if isinstance(self.ids, np.ndarray) else list(self.ids)
+            other._rows = dict(self._row_map())
+            other.next_id = self.next_id
+            other.tombstones = set(self.tombstones)
+            other.metadata = {field: column.copy() for field, column in self.metadata.items()}
+            return other
+
+    def memory_bytes(self) -> int:
+        """
+        Estimated memory of the index: ntotal codes of code_size bytes, plus the
+        HNSW links or the IVF ids and centroids. Worked out from the index sizes,
+        so it costs nothing even for very large stores.
+        """
+        if self.precision == "binary":
+            return int(self.index.ntotal * self.index.code_size)
+
+        index = faiss.downcast_index(self.index)
+        if self.index_type == "hnsw":
+            # int32 neighbor ids for every link slot, plus a level and an offset per node
+            storage = faiss.downcast_index(index.storage)
+            graph = index.hnsw.neighbors.size() * 4 + index.hnsw.levels.size() * 4 + index.hnsw.offsets.size() * 8
+            return int(index.ntotal * storage.code_size + graph)
+
+        total = index.ntotal * index.code_size
+        if self.index_type in ("ivf", "ivfpq"):
+            total += index.ntotal * 8  # the int64 id stored next to each code
+            total += index.quantizer.ntotal * index.d * 4  # coarse centroids
+        if self.index_type == "ivfpq":
+            total += index.pq.centroids.size() * 4
+        return int(total)
+
+    def config(self) -> dict:
+        """Settings needed to rebuild or reload this store."""
+        return {
+            "dim": self.dim,
+            "precision": self.precision,
+            "rescore": self.rescore,
+            "reduce_to": self.reduce_to,
+            "reduction": self.reduction,
+            "index_type": self.index_type,
+            "nlist": self.nlist,
+            "nprobe": self.nprobe,
+            "hnsw_m": self.hnsw_m,
+            "ef_search": self.ef_search,
+            "pq_m": self.pq_m,
+            "compact_threshold": self.compact_threshold,
+            "metric": self.metric,
+        }
+
     def save(self, path: str):
-        faiss.write_index(self.index, path)
+        """
+        Writes the store to the directory path: the FAISS index, the fitted
+        reducer (if any), the chunk texts and a manifest. Everything is written
+        to a temporary directory that then replaces path, so an existing store
+        there (even one that is memory-mapped) stays intact until the new one
+        is complete. Writes and compaction wait until the files are written.
+        """
+        path = os.path.abspath(path)
+        tmp = f"{path}.tmp-{os.getpid()}"
+        shutil.rmtree(tmp, ignore_errors=True)
+        os.makedirs(tmp)
+
+        # Writers and compaction wait, so every file describes the same rows
+        with self._write_lock:
+            if self.precision == "binary":
+                faiss.write_index_binary(self.index, os.path.join(tmp, INDEX_FILE))
+            else:
+                faiss.write_index(self.index, os.path.join(tmp, INDEX_FILE))
+
+            if self.reducer is not None:
+                faiss.write_VectorTransform(self.reducer, os.path.join(tmp, REDUCER_FILE))
+
+            TextBlob.write(tmp, self.data)
+            np.save(os.path.join(tmp, IDS_FILE), np.asarray(self.ids, dtype=np.int64))
+            np.save(os.path.join(tmp, DELETED_FILE), np.array(sorted(self.tombstones), dtype=np.int64))
+
+            # Columns are saved as metadata-N.* files; the field names map to them
+            fields = list(self.metadata)
+            for i, field in enumerate(fields):
+                self.metadata[field].write(tmp, f"metadata-{i}")
+            with open(os.path.join(tmp, METADATA_FILE), "w") as f:
+                json.dump(fields, f)
+
+            manifest = {
+                "format": STORE_FORMAT,
+                "count": len(self.data),
+                "next_id": self.next_id,
+                "config": self.config(),
+            }
+            with open(os.path.join(tmp, MANIFEST_FILE), "w") as f:
+                json.dump(manifest, f, indent=2)
+
+        # os.replace can't overwrite a non-empty directory, so an old store is
+        # renamed aside first. Mapped files stay valid after being unlinked.
+        old = None
+        if os.path.exists(path):
+            old = f"{path}.old-{os.getpid()}"
+            shutil.rmtree(old, ignore_errors=True)
+            os.replace(path, old)
+        os.replace(tmp, path)
+        if old is not None:
+            shutil.rmtree(old, ignore_errors=True)
+
+    def load(self, path: str, mmap: bool = False):
+        """
+        Restores a store saved with save(). With mmap=True the index, chunk
+        texts, ids and metadata codes are memory-mapped rather than read, and
+        the store is read-only.
+        """
+        if os.path.isfile(path):
+            return self._load_index_file(path)
+
+        with open(os.path.join(path, MANIFEST_FILE)) as f:
+            manifest = json.load(f)
+        if manifest["format"] != STORE_FORMAT:
+            raise ValueError(f"Unsupported store format: {manifest['format']}")
+
+        for name, value in manifest["config"].items():
+            setattr(self, name, value)
+
+        reducer_path = os.path.join(path, REDUCER_FILE)
+        self.reducer = faiss.read_VectorTransform(reducer_path) if self.reduce_to is not None else None
+
+        flags = faiss.IO_FLAG_MMAP_IFC if mmap else 0
+        index_path = os.path.join(path, INDEX_FILE)
+        if self.precision == "binary":
+            self.index = faiss.read_index_binary(index_path, flags)
+        else:
+            self.index = faiss.read_index(index_path, flags)
+
+        texts = TextBlob.open(path, mmap=mmap)
+        self.data = texts if mmap else list(texts)
+        self.read_only = mmap
+
+        ids = np.load(os.path.join(path, IDS_FILE), mmap_mode="r" if mmap else None)
+        self.ids = ids if mmap else ids.tolist()
+        self.tombstones = set(np.load(os.path.join(path, DELETED_FILE)).tolist())
+        self._rows = None  # see _row_map
+        self.next_id = manifest["next_id"]
+        self._selector = None
+
+        with open(os.path.join(path, METADATA_FILE)) as f:
+            fields = json.load(f)
+        self.metadata = {
+            field: Column.open(path, f"metadata-{i}", mmap=mmap) for i, field in enumerate(fields)
+        }
+        self._filter_masks = {}
+
+    def _load_index_file(self, path: str):
+        # Older saves: a bare index file with a .json sidecar and no chunk texts
+        if os.path.exists(path + ".json"):
+            with open(path + ".json") as f:
+                config = json.load(f)
+            # Keys missing from older sidecars keep this instance's values
+            for name, value in config.items():
+                setattr(self, name, value)
+
+        self.reducer = (
+            faiss.read_VectorTransform(path + ".reducer") if self.reduce_to is not None else None
+        )
+
+        if self.precision == "binary":
+            self.index = faiss.read_index_binary(path)
+        else:
+            self.index = faiss.read_index(path)
 
-    def load(self, path: str):
-        self.index = faiss.read_index(path)
+        self.ids = list(range(self.index.ntotal))
+        self._rows = {i: i for i in self.ids}
+        self.next_id = self.index.ntotal
+        self.tombstones = set()
+        self._selector = None
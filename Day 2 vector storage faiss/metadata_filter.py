@@ -0,0 +1,236 @@
+"""
+Filter expressions over columnar chunk metadata.
+
+Filters use the same shape as the Haystack filters built in Day 7:
+
+    {"operator": "AND", "conditions": [
+        {"field": "meta.tenant", "operator": "==", "value": "acme"},
+        {"field": "meta.year", "operator": ">=", "value": 2023},
+    ]}
+
+A plain {"tenant": "acme", "year": 2023} dict is shorthand for an AND of
+equality conditions. filter_mask turns either form into a boolean mask over
+the stored rows, which VectorStore hands to FAISS as a bitmap selector.
+
+Each field is a dictionary-encoded Column, so a condition is evaluated once
+per distinct value and then mapped onto every row with one array lookup.
+"""
+import json
+import operator
+import os
+
+import numpy as np
+
+COMPARISONS = {
+    "==": operator.eq,
+    "!=": operator.ne,
+    ">": operator.gt,
+    ">=": operator.ge,
+    "<": operator.lt,
+    "<=": operator.le,
+}
+LOGICAL = ("AND", "OR", "NOT")
+
+# Code of the rows that don't have a field
+MISSING = -1
+
+
+def _key(value):
+    """Hashable stand-in for a value, so dicts and lists can be encoded too."""
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return ("json", json.dumps(value, sort_keys=True, default=str))
+
+
+def _is_number(value) -> bool:
+    return isinstance(value, (int, float, np.number, np.bool_))
+
+
+class Column:
+    """
+    One metadata field for every row: codes[row] indexes the field's distinct
+    values, and MISSING marks rows without the field. Codes live in a buffer
+    that doubles as it fills, so appending row by row stays cheap.
+    """
+
+    def __init__(self, codes: np.ndarray = None, values=None):
+        self._codes = np.empty(0, dtype=np.int32) if codes is None else codes
+        self._size = len(self._codes)
+        self.values = [] if values is None else values
+        self._lookup = None  # value key -> code, built on first use
+        self._numeric = None  # values as a numeric array, False if not all numbers
+
+    @classmethod
+    def from_values(cls, values) -> "Column":
+        column = cls()
+        column.extend(values)
+        return column
+
+    @property
+    def codes(self) -> np.ndarray:
+        return self._codes[:self._size]
+
+    def __len__(self):
+        return self._size
+
+    def _lookup_table(self) -> dict:
+        if self._lookup is None:
+            self._lookup = {}
+            for code, value in enumerate(self.values):
+                self._lookup.setdefault(_key(value), code)
+        return self._lookup
+
+    def extend(self, values):
+        """Appends one value per row (None where the row has no value)."""
+        lookup = self._lookup_table()
+        codes = np.empty(len(values), dtype=np.int32)
+        for i, value in enumerate(values):
+            if value is None:
+                codes[i] = MISSING
+                continue
+            key = _key(value)
+            code = lookup.get(key)
+            if code is None:
+                code = lookup[key] = len(self.values)
+                self.values.append(value)
+                self._numeric = None
+            codes[i] = code
+        self._append_codes(codes)
+
+    def extend_missing(self, count: int):
+        self._append_codes(np.full(count, MISSING, dtype=np.int32))
+
+    def _append_codes(self, codes: np.ndarray):
+        size = self._size + len(codes)
+        if size > len(self._codes):
+            grown = np.empty(max(size, 2 * len(self._codes), 16), dtype=np.int32)
+            grown[:self._size] = self.codes
+            self._codes = grown
+        self._codes[self._size:size] = codes
+        self._size = size
+
+    def take(self, rows: np.ndarray) -> "Column":
+        """New column holding only the given rows, in order."""
+        return Column(self.codes[rows], list(self.values))
+
+    def copy(self) -> "Column":
+        return Column(self.codes.copy(), list(self.values))
+
+    def write(self, directory: str, name: str):
+        """
+        Saves the codes as name.codes.npy, and the distinct values as
+        name.values.npy when they are all numbers (name.values.json otherwise).
+        """
+        np.save(os.path.join(directory, f"{name}.codes.npy"), self.codes)
+        numeric = self._numeric_values()
+        if numeric is not None:
+            np.save(os.path.join(directory, f"{name}.values.npy"), numeric)
+        else:
+            with open(os.path.join(directory, f"{name}.values.json"), "w") as f:
+                json.dump(list(self.values), f)
+
+    @classmethod
+    def open(cls, directory: str, name: str, mmap: bool = False) -> "Column":
+        """Loads a column saved with write(); mmap=True leaves the arrays on disk."""
+        mmap_mode = "r" if mmap else None
+        codes = np.load(os.path.join(directory, f"{name}.codes.npy"), mmap_mode=mmap_mode)
+        values_path = os.path.join(directory, f"{name}.values.npy")
+        if os.path.exists(values_path):
+            values = np.load(values_path, mmap_mode=mmap_mode)
+            if not mmap:
+                values = values.tolist()
+        else:
+            with open(os.path.join(directory, f"{name}.values.json")) as f:
+                values = json.load(f)
+        return cls(codes, values)
+
+    def tolist(self) -> list:
+        return [None if code == MISSING else self.values[code] for code in self.codes.tolist()]
+
+    def _numeric_values(self):
+        """The distinct values as a numeric array, or None unless they are all numbers."""
+        if self._numeric is None:
+            self._numeric = False
+            if isinstance(self.values, np.ndarray):
+                self._numeric = self.values  # memory-mapped numbers from open()
+            elif len(self.values) and all(_is_number(v) for v in self.values):
+                values = np.asarray(self.values)
+                if values.dtype.kind in "biuf":
+                    self._numeric = values
+        return None if self._numeric is False else self._numeric
+
+    def _code_of(self, value):
+        if value is None:
+            return MISSING
+        numeric = self._numeric_values()
+        if numeric is not None:
+            if not _is_number(value):
+                return None
+            hits = np.flatnonzero(numeric == value)
+            return int(hits[0]) if len(hits) else None
+        return self._lookup_table().get(_key(value))
+
+    def mask(self, op: str, value) -> np.ndarray:
+        """Boolean mask of the rows whose value satisfies (row value) op value."""
+        # One flag per distinct value, plus a last one picked up by MISSING (-1)
+        matches = np.zeros(len(self.values) + 1, dtype=bool)
+
+        if op in ("in", "not in", "==", "!="):
+            for item in (value if op in ("in", "not in") else [value]):
+                code = self._code_of(item)
+                if code is not None:
+                    matches[code] = True
+            if op in ("not in", "!="):
+                matches = ~matches
+            return matches[self.codes]
+
+        if op not in COMPARISONS:
+            raise ValueError(f"Unknown filter operator: {op}")
+
+        compare = COMPARISONS[op]
+        numeric = self._numeric_values()
+        if numeric is not None:
+            try:
+                matches[:-1] = compare(numeric, value)
+            except TypeError:
+                pass  # e.g. a string compared against a numeric field
+        else:
+            # Mixed or non-numeric values; ones that can't be ordered don't match
+            for code, v in enumerate(self.values):
+                try:
+                    matches[code] = bool(compare(v, value))
+                except TypeError:
+                    pass
+        return matches[self.codes]
+
+
+def filter_mask(filters: dict, columns: dict, n: int) -> np.ndarray:
+    """
+    Evaluates a filter expression against columns ({field: Column of n rows}).
+    Returns a boolean mask of the rows that match.
+    """
+    if "operator" not in filters:
+        filters = {
+            "operator": "AND",
+            "conditions": [{"field": k, "operator": "==", "value": v} for k, v in filters.items()],
+        }
+
+    op = filters["operator"]
+    if op in LOGICAL:
+        masks = [filter_mask(c, columns, n) for c in filters["conditions"]]
+        if op == "AND":
+            return np.logical_and.reduce(masks) if masks else np.ones(n, dtype=bool)
+        if op == "OR":
+            return np.logical_or.reduce(masks) if masks else np.zeros(n, dtype=bool)
+        return ~np.logical_and.reduce(masks) if masks else np.zeros(n, dtype=bool)
+
+    field = filters["field"]
+    field = field[len("meta."):] if field.startswith("meta.") else field
+    column = columns.get(field)
+    if column is None:
+        # Nobody has this field, so only "!=" / "not in" can match
+        return np.full(n, op in ("!=", "not in"), dtype=bool)
+
+    return column.mask(op, filters["value"])
@@ -0,0 +1,184 @@
+import bisect
+import heapq
+import itertools
+import json
+import os
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+
+import numpy as np
+
+from faiss_store import VectorStore, as_int_ids
+
+SHARDING_FILE = "sharding.json"
+PARTITIONS = ("hash", "range")
+
+
+def shard_dir(path: str, shard: int) -> str:
+    return os.path.join(path, f"shard_{shard:03d}")
+
+
+class ShardedVectorStore:
+    """
+    Splits chunks across num_shards VectorStores and searches them in parallel.
+
+    partition decides which shard owns an id:
+    - "hash":  crc32 of the id, so shards fill evenly whatever the ids look like
+    - "range": boundaries (num_shards - 1 sorted ids); shard i holds the ids
+               between boundaries[i - 1] and boundaries[i]
+
+    Since the owner depends only on the id, upsert and delete go to exactly one
+    shard. A search fans out to every shard on a thread pool (FAISS releases
+    the GIL while it searches), and the per-shard top k lists are merged with
+    a heap. Extra keyword arguments configure every shard's VectorStore.
+
+    Each shard is saved to its own VectorStore directory (shard_000, ...), so a
+    single shard can also be opened on its own with VectorStore.load.
+    """
+
+    def __init__(self, dim: int, num_shards: int = 4, partition: str = "hash",
+                 boundaries: list = None, workers: int = None, **store_kwargs):
+        if partition not in PARTITIONS:
+            raise ValueError(f"Unknown partition: {partition}")
+        if partition == "range" and (boundaries is None or len(boundaries) != num_shards - 1):
+            raise ValueError("Range partitioning needs num_shards - 1 boundaries")
+
+        self.dim = dim
+        self.num_shards = num_shards
+        self.partition = partition
+        self.boundaries = sorted(boundaries) if boundaries is not None else None
+        self.workers = workers or num_shards
+        self.shards = [VectorStore(dim, **store_kwargs) for _ in range(num_shards)]
+        self.next_id = 0
+        self._executor = None
+
+    def shard_of(self, id_) -> int:
+        if self.partition == "range":
+            return bisect.bisect_right(self.boundaries, id_)
+        return zlib.crc32(str(id_).encode("utf-8")) % self.num_shards
+
+    def _route(self, ids) -> dict:
+        """Maps shard number -> positions in ids owned by that shard."""
+        routed = {}
+        for pos, id_ in enumerate(ids):
+            routed.setdefault(self.shard_of(id_), []).append(pos)
+        return routed
+
+    def train(self, vectors: np.ndarray):
+        """
+        Trains every shard on the same sample, so reductions and quantizers
+        agree and distances from different shards can be compared.
+        """
+        for shard in self.shards:
+            shard.train(vectors)
+
+    def add(self, vectors: np.ndarray, chunks: list, ids: list = None, metadata: list = None):
+        ids = list(range(self.next_id, self.next_id + len(chunks))) if ids is None else as_int_ids(ids)
+        self._check_batch(vectors, chunks, ids, metadata)
+        if any(id_ in self.shards[self.shard_of(id_)] for id_ in ids):
+            raise ValueError("Id already in the store; use upsert() to replace it")
+        self._write("add", ids, vectors, chunks, metadata)
+
+    def upsert(self, ids: list, vectors: np.ndarray, chunks: list, metadata: list = None):
+        ids = as_int_ids(ids)
+        self._check_batch(vectors, chunks, ids, metadata)
+        self._write("upsert", ids, vectors, chunks, metadata)
+
+    @staticmethod
+    def _check_batch(vectors, chunks, ids, metadata):
+        # Checked up front so a rejected batch leaves no shard half-written
+        if vectors.shape[0] != len(chunks):
+            raise ValueError("Vector count must match chunk count")
+        if len(ids) != len(chunks):
+            raise ValueError("Id count must match chunk count")
+        if len(set(ids)) != len(ids):
+            raise ValueError("Duplicate ids in one call")
+        if metadata is not None and len(metadata) != len(chunks):
+            raise ValueError("Metadata count must match chunk count")
+
+    def _write(self, method: str, ids, vectors, chunks, metadata):
+        for shard, positions in self._route(ids).items():
+            getattr(self.shards[shard], method)(
+                vectors=vectors[positions],
+                chunks=[chunks[p] for p in positions],
+                ids=[ids[p] for p in positions],
+                metadata=None if metadata is None else [metadata[p] for p in positions],
+            )
+        self.next_id = max([self.next_id] + [i + 1 for i in ids])
+
+    def delete(self, ids: list) -> int:
+        ids = as_int_ids(ids)
+        return sum(
+            self.shards[shard].delete([ids[p] for p in positions])
+            for shard, positions in self._route(ids).items()
+        )
+
+    def __len__(self):
+        return sum(len(shard) for shard in self.shards)
+
+    def search(self, query_vec: np.ndarray, k: int = 3, **kwargs):
+        """Searches every shard and returns the merged top k as (chunk_text, distance)."""
+        return self.search_batch(np.atleast_2d(query_vec)[:1], k, **kwargs)[0]
+
+    def search_batch(self, query_vecs: np.ndarray, k: int = 3, **kwargs):
+        """
+        Runs search_batch on all shards concurrently and merges the results
+        per query. kwargs (nprobe, ef_search, filters, ...) go to every shard.
+        """
+        query_vecs = np.atleast_2d(query_vecs)
+        per_shard = list(self._pool().map(
+            lambda shard: shard.search_batch(query_vecs, k, **kwargs), self.shards
+        ))
+
+        # Each shard's list is already sorted, so a k-way merge is enough
+        return [
+            list(itertools.islice(heapq.merge(*lists, key=self._rank_key), k))
+            for lists in zip(*per_shard)
+        ]
+
+    def search_range(self, query_vec: np.ndarray, **kwargs):
+        """search_range on every shard, merged best first."""
+        per_shard = self._pool().map(lambda shard: shard.search_range(query_vec, **kwargs), self.shards)
+        return list(heapq.merge(*per_shard, key=self._rank_key))
+
+    def _rank_key(self, hit):
+        # Scores (ip / cosine) rank highest first, distances lowest first
+        return -hit[1] if self.shards[0].similarity else hit[1]
+
+    def _pool(self) -> ThreadPoolExecutor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.workers)
+        return self._executor
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown()
+            self._executor = None
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        for i, shard in enumerate(self.shards):
+            shard.save(shard_dir(path, i))
+
+        with open(os.path.join(path, SHARDING_FILE), "w") as f:
+            json.dump({
+                "num_shards": self.num_shards,
+                "partition": self.partition,
+                "boundaries": self.boundaries,
+                "next_id": self.next_id,
+            }, f, indent=2)
+
+    def load(self, path: str, mmap: bool = False):
+        with open(os.path.join(path, SHARDING_FILE)) as f:
+            sharding = json.load(f)
+
+        self.num_shards = sharding["num_shards"]
+        self.partition = sharding["partition"]
+        self.boundaries = sharding["boundaries"]
+        self.next_id = sharding["next_id"]
+
+        self.shards = []
+        for i in range(self.num_shards):
+            shard = VectorStore(self.dim)
+            shard.load(shard_dir(path, i), mmap=mmap)
+            self.shards.append(shard)
@@ -1,8 +1,18 @@
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
 from heatmap import plot_heatmap
+from model_registry import get_model
+from onnx_backend import load_onnx
 
 
 def load_sample():
@@ -15,18 +25,21 @@ def load_sample():
     ]
 
 
-def embed(model_name, samples):
-    model = SentenceTransformer(model_name)
+def embed(model_name, samples, backend="torch"):
+    if backend == "onnx":
+        model = get_model(model_name, loader=load_onnx)
+    else:
+        model = get_model(model_name)
     embeddings = model.encode(samples, convert_to_numpy=True, normalize_embeddings=True)
     return embeddings
 
 
-def compare_models(models, samples):
+def compare_models(models, samples, heatmap_dir=None, show=True, backend="torch"):
     for name in models:
         print(f"\nModel: {name}")
         print("-" * (8 + len(name)))
 
-        vectors = embed(name, samples)
+        vectors = embed(name, samples, backend)
         sim_matrix = cosine_similarity(vectors)
 
         avg_sim = np.mean(sim_matrix)
@@ -43,23 +56,164 @@ def compare_models(models, samples):
             )
 
         # Render similarity heatmap for this model
-        plot_heatmap(
-            sim_matrix,
-            labels=[f"S{i+1}" for i in range(len(samples))],
-            title=f"Cosine Similarity Heatmap — {name}",
-        )
+        if show or heatmap_dir:
+            plot_heatmap(
+                sim_matrix,
+                labels=[f"S{i+1}" for i in range(len(samples))],
+                title=f"Cosine Similarity Heatmap — {name}",
+                save_path=_heatmap_path(heatmap_dir, name),
+                show=show,
+            )
 
 
-def main():
-    samples = load_sample()
+def _heatmap_path(heatmap_dir, model_name):
+    if not heatmap_dir:
+        return None
+    os.makedirs(heatmap_dir, exist_ok=True)
+    return os.path.join(heatmap_dir, model_name.replace("/", "-") + ".png")
+
 
-    models = [
-        "all-MiniLM-L6-v2",
-        "all-mpnet-base-v2",
-        "intfloat/e5-small-v2",
+# ---------------------------------------------------------------------------
+# Benchmark mode
+# ---------------------------------------------------------------------------
+
+WORDS = (
+    "vector search embeddings retrieval model sentence semantic similarity index "
+    "query document chunk context language neural network training data meaning "
+    "keyword ranking relevance latency throughput memory dimension cosine"
+).split()
+
+
+def synthetic_corpus(n: int, seed: int = 0):
+    """Generates n sentences of 6-40 words, roughly the shape of real chunks."""
+    rng = random.Random(seed)
+    return [
+        " ".join(rng.choices(WORDS, k=rng.randint(6, 40))).capitalize() + "."
+        for _ in range(n)
     ]
 
-    compare_models(models, samples)
+
+def load_corpus(path: str):
+    """Reads one sentence per non-empty line."""
+    with open(path, encoding="utf-8") as f:
+        return [line.strip() for line in f if line.strip()]
+
+
+def _peak_rss_mb():
+    try:
+        import resource
+    except ImportError:  # Windows
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    return round(peak / (1 << 20) if os.uname().sysname == "Darwin" else peak / 1024, 1)
+
+
+def benchmark_model(name, corpus, batch_sizes, n_queries, backend="torch"):
+    """
+    Measures one model: load time, embedding dimension, throughput at each
+    batch size, single-query latency percentiles and peak RSS.
+    Meant to run in its own process so load time and RSS are not shared.
+    """
+    from sentence_transformers import SentenceTransformer
+
+    started = time.perf_counter()
+    model = load_onnx(name) if backend == "onnx" else SentenceTransformer(name)
+    load_s = time.perf_counter() - started
+
+    # Warm-up pass so lazy initialization isn't billed to the first measurement
+    model.encode(corpus[:8])
+
+    throughput = {}
+    for bs in batch_sizes:
+        started = time.perf_counter()
+        vectors = model.encode(corpus, batch_size=bs, convert_to_numpy=True)
+        throughput[bs] = len(corpus) / (time.perf_counter() - started)
+
+    latencies = []
+    for query in corpus[:n_queries]:
+        started = time.perf_counter()
+        model.encode([query], convert_to_numpy=True)
+        latencies.append((time.perf_counter() - started) * 1000)
+
+    return {
+        "model": name,
+        "backend": backend,
+        "load_s": round(load_s, 3),
+        "dim": int(vectors.shape[1]),
+        "sentences_per_sec": {str(bs): round(v, 1) for bs, v in throughput.items()},
+        "latency_p50_ms": round(float(np.percentile(latencies, 50)), 2),
+        "latency_p95_ms": round(float(np.percentile(latencies, 95)), 2),
+        "peak_rss_mb": _peak_rss_mb(),
+    }
+
+
+def run_benchmark(models, corpus, batch_sizes, n_queries, backend="torch"):
+    results = []
+    for name in models:
+        # A fresh process per model keeps load time and peak RSS independent
+        with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as pool:
+            result = pool.submit(benchmark_model, name, corpus, batch_sizes, n_queries, backend).result()
+        print(json.dumps(result))
+        results.append(result)
+    return results
+
+
+def write_results(results, batch_sizes, output_dir):
+    os.makedirs(output_dir, exist_ok=True)
+
+    with open(os.path.join(output_dir, "benchmark.json"), "w", encoding="utf-8") as f:
+        json.dump(results, f, indent=2)
+
+    fields = ["model", "backend", "load_s", "dim", "latency_p50_ms", "latency_p95_ms", "peak_rss_mb"]
+    with open(os.path.join(output_dir, "benchmark.csv"), "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(fields + [f"sentences_per_sec_bs{bs}" for bs in batch_sizes])
+        for r in results:
+            writer.writerow([r[k] for k in fields] + [r["sentences_per_sec"][str(bs)] for bs in batch_sizes])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare embedding models.")
+    parser.add_argument("--models", default="all-MiniLM-L6-v2,all-mpnet-base-v2,intfloat/e5-small-v2",
+                        help="comma-separated model names")
+    parser.add_argument("--backend", choices=["torch", "onnx"], default="torch")
+    parser.add_argument("--heatmap-dir", default=None, help="save similarity heatmaps here")
+    parser.add_argument("--no-show", action="store_true", help="don't open heatmap windows")
+    parser.add_argument("--benchmark", action="store_true",
+                        help="headless benchmark: load time, throughput, latency, memory, dimension")
+    parser.add_argument("--corpus", default=None, help="benchmark corpus file, one sentence per line")
+    parser.add_argument("--n-sentences", type=int, default=2000, help="synthetic corpus size")
+    parser.add_argument("--batch-sizes", default="1,8,32,128")
+    parser.add_argument("--queries", type=int, default=200, help="single-query latency samples")
+    parser.add_argument("--output-dir", default="benchmark_results")
+    args = parser.parse_args()
+
+    models = args.models.split(",")
+
+    if args.benchmark:
+        corpus = load_corpus(args.corpus) if args.corpus else synthetic_corpus(args.n_sentences)
+        batch_sizes = [int(b) for b in args.batch_sizes.split(",")]
+        results = run_benchmark(models, corpus, batch_sizes, args.queries, args.backend)
+        write_results(results, batch_sizes, args.output_dir)
+
+        # Heatmaps are only produced when explicitly requested
+        if args.heatmap_dir:
+            for name in models:
+                vectors = embed(name, load_sample(), args.backend)
+                sim_matrix = cosine_similarity(vectors)
+                plot_heatmap(
+                    sim_matrix,
+                    labels=[f"S{i+1}" for i in range(len(sim_matrix))],
+                    title=f"Cosine Similarity Heatmap — {name}",
+                    save_path=_heatmap_path(args.heatmap_dir, name),
+                    show=False,
+                )
+        return
+
+    samples = load_sample()
+    compare_models(models, samples, heatmap_dir=args.heatmap_dir, show=not args.no_show,
+                   backend=args.backend)
 
 
 if __name__ == "__main__":
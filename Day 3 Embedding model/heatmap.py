@@ -3,9 +3,10 @@ import seaborn as sns
 import numpy as np
 
 
-def plot_heatmap(sim_matrix, labels, title, save_path=None):
+def plot_heatmap(sim_matrix, labels, title, save_path=None, show=True):
     """
     Renders a cosine similarity heatmap for a given model.
+    With show=False the figure is only saved (if save_path is set) and closed.
     """
     plt.figure(figsize=(8, 6))
 
@@ -28,4 +29,7 @@ def plot_heatmap(sim_matrix, labels, title, save_path=None):
     if save_path:
         plt.savefig(save_path, dpi=300)
 
-    plt.show()
+    if show:
+        plt.show()
+    else:
+        plt.close()
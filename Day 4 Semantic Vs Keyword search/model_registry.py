@@ -0,0 +1,140 @@
+import os
+import threading
+import weakref
+from collections import OrderedDict
+
+from sentence_transformers import SentenceTransformer
+
+
+def _default_warmup(model):
+    # Run one tiny forward pass so the first real query doesn't pay for lazy init
+    if hasattr(model, "encode"):
+        model.encode(["warm up"])
+
+
+def _torch_bytes(model) -> int:
+    try:
+        return sum(p.numel() * p.element_size() for p in model.parameters())
+    except (AttributeError, TypeError):
+        return 0
+
+
+def _onnx_bytes(model) -> int:
+    # An ONNX Runtime session holds about the size of its model file
+    try:
+        modules = list(model.modules())
+    except (AttributeError, TypeError):
+        return 0
+    paths = {getattr(getattr(m, "auto_model", None), "model_path", None) for m in modules}
+    return sum(os.path.getsize(p) for p in paths if p is not None and os.path.isfile(p))
+
+
+def _model_bytes(model, depth: int = 2) -> int:
+    """
+    Approximate memory held by a model's weights (0 if it can't be measured).
+    Wrappers such as pymilvus' rerank functions are measured through .model.
+    """
+    size = _torch_bytes(model) or _onnx_bytes(model)
+    if not size and depth and getattr(model, "model", None) is not None:
+        return _model_bytes(model.model, depth - 1)
+    return size
+
+
+def _freeze(value):
+    """Hashable stand-in for a loader kwarg, e.g. model_kwargs={...}."""
+    if isinstance(value, dict):
+        return ("dict",) + tuple(sorted((str(k), _freeze(v)) for k, v in value.items()))
+    if isinstance(value, (list, tuple)):
+        return (type(value).__name__,) + tuple(_freeze(v) for v in value)
+    try:
+        hash(value)
+        return value
+    except TypeError:
+        return repr(value)
+
+
+class ModelRegistry:
+    """
+    Process-wide cache of loaded models.
+
+    A model is loaded on first use and the same instance is handed to every
+    later caller. When max_bytes is set, the least recently used models are
+    dropped once the loaded weights exceed it. That only frees memory if no
+    caller still holds the model, so long-lived callers should call get() on
+    each use; an evicted model that is still referenced is handed back by the
+    next get() rather than loaded a second time.
+    """
+
+    def __init__(self, max_bytes: int = None):
+        self.max_bytes = max_bytes
+        self._models = OrderedDict()  # key -> (model, size in bytes)
+        self._evicted = weakref.WeakValueDictionary()  # key -> evicted model still alive elsewhere
+        self._lock = threading.RLock()
+
+    @staticmethod
+    def _key(name, loader, kwargs):
+        loader_id = f"{loader.__module__}.{loader.__qualname__}"
+        return name, loader_id, _freeze(kwargs)
+
+    def get(self, name: str, loader=SentenceTransformer, warmup=None, **kwargs):
+        """
+        Returns the model for name, loading it with loader(name, **kwargs) on first use.
+        warmup, if given, is called once with the freshly loaded model.
+        """
+        key = self._key(name, loader, kwargs)
+
+        with self._lock:
+            if key in self._models:
+                self._models.move_to_end(key)
+                return self._models[key][0]
+
+            model = self._evicted.pop(key, None)
+            if model is None:
+                model = loader(name, **kwargs)
+                if warmup is not None:
+                    warmup(model)
+
+            self._models[key] = (model, _model_bytes(model))
+            self._evict(keep=key)
+            return model
+
+    def warm_up(self, names, loader=SentenceTransformer, warmup=_default_warmup, **kwargs):
+        """Loads and warms up a list of models ahead of the first request."""
+        for name in names:
+            self.get(name, loader=loader, warmup=warmup, **kwargs)
+
+    def _evict(self, keep):
+        if self.max_bytes is None:
+            return
+        while self.loaded_bytes() > self.max_bytes and len(self._models) > 1:
+            oldest = next(iter(self._models))
+            if oldest == keep:
+                break
+            self._drop(oldest)
+
+    def _drop(self, key):
+        model, _ = self._models.pop(key)
+        try:
+            self._evicted[key] = model
+        except TypeError:
+            pass  # not weak-referenceable, so it can't be tracked once dropped
+
+    def loaded_bytes(self) -> int:
+        return sum(size for _, size in self._models.values())
+
+    def evict(self, name: str = None):
+        """Drops one model by name, or every model if name is None."""
+        with self._lock:
+            for key in [k for k in self._models if name is None or k[0] == name]:
+                self._drop(key)
+
+    def __contains__(self, name):
+        return any(key[0] == name for key in self._models)
+
+
+registry = ModelRegistry()
+
+
+def get_model(name: str, loader=SentenceTransformer, warmup=None, **kwargs):
+    """Shortcut for registry.get on the process-wide registry."""
+    return registry.get(name, loader=loader, warmup=warmup, **kwargs)
@@ -1,8 +1,12 @@
+import os
+
 import numpy as np
-from sklearn.feature_extraction.text import TfidfVectorizer
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 
+from model_registry import get_model
+from onnx_backend import load_onnx
+from tfidf_index import TfidfIndex
+
 
 def load_documents():
     return [
@@ -14,25 +18,30 @@ def load_documents():
     ]
 
 
-def keyword_search(query, documents):
+def keyword_search(query, index, top_k=None):
     """
     Implements a simple TF-IDF keyword search.
+    The index is fitted once (see TfidfIndex) and reused for every query.
     """
-    vectorizer = TfidfVectorizer()
-    doc_vectors = vectorizer.fit_transform(documents)
-    query_vector = vectorizer.transform([query])
+    return index.search(query, top_k)
 
-    scores = (doc_vectors @ query_vector.T).toarray().flatten()
-    ranked_indices = np.argsort(scores)[::-1]
 
-    return [(documents[i], scores[i]) for i in ranked_indices]
+def load_model(model_name="all-MiniLM-L6-v2"):
+    """
+    The embedding model, loaded once per process via the registry.
+    EMBED_BACKEND=onnx runs it through int8-quantized ONNX Runtime.
+    """
+    if os.getenv("EMBED_BACKEND") == "onnx":
+        return get_model(model_name, loader=load_onnx)
+    return get_model(model_name)
 
 
 def semantic_search(query, documents):
     """
     Performs semantic search using SentenceTransformer embeddings.
     """
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    # Loaded once per process and shared by every query
+    model = load_model()
 
     doc_vecs = model.encode(documents, convert_to_numpy=True, normalize_embeddings=True)
     query_vec = model.encode([query], convert_to_numpy=True, normalize_embeddings=True)
@@ -53,10 +62,11 @@ def display_results(title, results, top_k=3):
 
 def main():
     documents = load_documents()
+    keyword_index = TfidfIndex().fit(documents)
 
     query = "How do machines learn patterns?"
 
-    keyword_results = keyword_search(query, documents)
+    keyword_results = keyword_search(query, keyword_index)
     semantic_results = semantic_search(query, documents)
 
     print(f"\nQuery: {query}")
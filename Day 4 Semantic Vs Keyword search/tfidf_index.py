@@ -0,0 +1,105 @@
+import json
+import os
+
+import numpy as np
+from scipy import sparse
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+MATRIX_FILE = "matrix.npz"
+VOCABULARY_FILE = "vocabulary.json"
+DOCUMENTS_FILE = "documents.json"
+
+
+def top_k_indices(scores: np.ndarray, k: int = None) -> np.ndarray:
+    """
+    Indices of the k highest scores, best first.
+    argpartition finds them in linear time; only those k are then sorted.
+    """
+    if k is None or k >= len(scores):
+        return np.argsort(scores)[::-1]
+    best = np.argpartition(-scores, k - 1)[:k]
+    return best[np.argsort(-scores[best], kind="stable")]
+
+
+class TfidfIndex:
+    """
+    TF-IDF keyword index that is fitted once and reused for every query.
+
+    The document-term matrix is kept as a sparse CSR matrix with L2-normalized
+    rows, plus its term-major transpose (CSR rows = posting lists). A query's
+    scores are one sparse product with the postings (cosine similarity) that
+    only touches the documents containing its terms, and a batch of queries
+    is one sparse matrix-matrix product. save() writes the matrix, vocabulary
+    and idf weights; load() restores them without refitting.
+    """
+
+    def __init__(self, **vectorizer_kwargs):
+        # Saved with the index, so they must be JSON-serializable
+        self.vectorizer_kwargs = vectorizer_kwargs
+        self.vectorizer = TfidfVectorizer(**vectorizer_kwargs)
+        self.matrix = None
+        self.postings = None
+        self.documents = []
+
+    def fit(self, documents: list) -> "TfidfIndex":
+        self.documents = list(documents)
+        self.matrix = self.vectorizer.fit_transform(self.documents).tocsr()
+        self.postings = self.matrix.T.tocsr()
+        return self
+
+    def search(self, query: str, top_k: int = None):
+        """
+        Returns (document, score) pairs for one query, best first
+        (every document when top_k is None).
+        """
+        query_vector = self.vectorizer.transform([query])
+        scores = (query_vector @ self.postings).toarray().ravel()
+        return [(self.documents[i], scores[i]) for i in top_k_indices(scores, top_k)]
+
+    def search_batch(self, queries: list, top_k: int = None):
+        """
+        Scores all queries with a single sparse matrix-matrix product.
+        Returns one list of (document, score) per query.
+        """
+        query_matrix = self.vectorizer.transform(queries)
+        scores = (query_matrix @ self.postings).tocsr()
+
+        results = []
+        for row in range(scores.shape[0]):
+            row_scores = scores[row].toarray().ravel()
+            results.append([(self.documents[i], row_scores[i]) for i in top_k_indices(row_scores, top_k)])
+        return results
+
+    def save(self, path: str):
+        os.makedirs(path, exist_ok=True)
+        sparse.save_npz(os.path.join(path, MATRIX_FILE), self.matrix)
+
+        with open(os.path.join(path, VOCABULARY_FILE), "w") as f:
+            json.dump({
+                "vectorizer_kwargs": self.vectorizer_kwargs,
+                "vocabulary": {term: int(i) for term, i in self.vectorizer.vocabulary_.items()},
+                "idf": self.vectorizer.idf_.tolist(),
+            }, f)
+
+        with open(os.path.join(path, DOCUMENTS_FILE), "w") as f:
+            json.dump(self.documents, f)
+
+    @classmethod
+    def load(cls, path: str) -> "TfidfIndex":
+        with open(os.path.join(path, VOCABULARY_FILE)) as f:
+            saved = json.load(f)
+
+        kwargs = saved["vectorizer_kwargs"]
+        if "ngram_range" in kwargs:
+            kwargs["ngram_range"] = tuple(kwargs["ngram_range"])  # JSON turned it into a list
+
+        index = cls(**kwargs)
+        # A fixed vocabulary plus the saved idf weights rebuild the fitted vectorizer
+        index.vectorizer = TfidfVectorizer(vocabulary=saved["vocabulary"], **kwargs)
+        index.vectorizer.idf_ = np.asarray(saved["idf"])
+        index.matrix = sparse.load_npz(os.path.join(path, MATRIX_FILE)).tocsr()
+        index.postings = index.matrix.T.tocsr()
+
+        with open(os.path.join(path, DOCUMENTS_FILE)) as f:
+            index.documents = json.load(f)
+        return index
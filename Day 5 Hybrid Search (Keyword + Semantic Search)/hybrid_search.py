@@ -1,7 +1,10 @@
+import os
+
 import numpy as np
-from sentence_transformers import SentenceTransformer
 from sklearn.metrics.pairwise import cosine_similarity
 from bm25_utils import bm25_scores
+from model_registry import get_model
+from onnx_backend import load_onnx
 
 
 def load_documents():
@@ -17,6 +20,16 @@ def load_documents():
     ]
 
 
+def load_model(model_name="all-MiniLM-L6-v2"):
+    """
+    The embedding model, loaded once per process via the registry.
+    EMBED_BACKEND=onnx runs it through int8-quantized ONNX Runtime.
+    """
+    if os.getenv("EMBED_BACKEND") == "onnx":
+        return get_model(model_name, loader=load_onnx)
+    return get_model(model_name)
+
+
 def semantic_scores(query, documents, model):
     doc_vecs = model.encode(documents, normalize_embeddings=True)
     q_vec = model.encode([query], normalize_embeddings=True)
@@ -86,7 +99,7 @@ def main():
     documents = load_documents()
     query = "machine learning with python"
 
-    model = SentenceTransformer("all-MiniLM-L6-v2")
+    model = load_model()
 
     # BM25
     bm25 = bm25_scores(query, documents)
@@ -1,41 +1,50 @@
-from sentence_transformers import SentenceTransformer, util
+from sentence_transformers import util
 from pymilvus.model.reranker import CrossEncoderRerankFunction
 
-#Fast bi-encoder retrieval
-bi_encoder = SentenceTransformer("all-MiniLM-L6-v2")
-query = "What event in 1956 marked the official birth of artificial intelligence as a discipline?"
-
-documents = [
-    "In 1950, Alan Turing published his seminal paper, 'Computing Machinery and Intelligence,' proposing the Turing Test as a criterion of intelligence, a foundational concept in the philosophy and development of artificial intelligence.",
-    "The Dartmouth Conference in 1956 is considered the birthplace of artificial intelligence as a field; here, John McCarthy and others coined the term 'artificial intelligence' and laid out its basic goals.",
-    "In 1951, British mathematician and computer scientist Alan Turing also developed the first program designed to play chess, demonstrating an early example of AI in game strategy.",
-    "The invention of the Logic Theorist by Allen Newell, Herbert A. Simon, and Cliff Shaw in 1955 marked the creation of the first true AI program, which was capable of solving logic problems, akin to proving mathematical theorems."
-]
-
-# Encode all documents
-doc_embeddings = bi_encoder.encode(documents, convert_to_tensor=True)
-
-# Encode query
-query_embedding = bi_encoder.encode(query, convert_to_tensor=True)
-
-# Get top-50 candidates using semantic search (fast)
-hits = util.semantic_search(query_embedding, doc_embeddings, top_k=50)
-candidates = [documents[hit['corpus_id']] for hit in hits[0]]
-
-# cross-encoder reranking
-ce_rf = CrossEncoderRerankFunction(
-    model_name="cross-encoder/ms-marco-MiniLM-L-6-v2",
-    device="cpu"
-)
-
-results = ce_rf(
-    query=query,
-    documents=candidates,
-    top_k=3
-)
-
-#  results
-for result in results:
-    print(f"Index: {result.index}")
-    print(f"Score: {result.score:.6f}")
-    print(f"Text: {result.text}\n")
+from model_registry import get_model
+
+
+def load_cross_encoder(model_name):
+    return CrossEncoderRerankFunction(model_name=model_name, device="cpu")
+
+
+def main():
+    #Fast bi-encoder retrieval
+    bi_encoder = get_model("all-MiniLM-L6-v2")
+    query = "What event in 1956 marked the official birth of artificial intelligence as a discipline?"
+
+    documents = [
+        "In 1950, Alan Turing published his seminal paper, 'Computing Machinery and Intelligence,' proposing the Turing Test as a criterion of intelligence, a foundational concept in the philosophy and development of artificial intelligence.",
+        "The Dartmouth Conference in 1956 is considered the birthplace of artificial intelligence as a field; here, John McCarthy and others coined the term 'artificial intelligence' and laid out its basic goals.",
+        "In 1951, British mathematician and computer scientist Alan Turing also developed the first program designed to play chess, demonstrating an early example of AI in game strategy.",
+        "The invention of the Logic Theorist by Allen Newell, Herbert A. Simon, and Cliff Shaw in 1955 marked the creation of the first true AI program, which was capable of solving logic problems, akin to proving mathematical theorems."
+    ]
+
+    # Encode all documents
+    doc_embeddings = bi_encoder.encode(documents, convert_to_tensor=True)
+
+    # Encode query
+    query_embedding = bi_encoder.encode(query, convert_to_tensor=True)
+
+    # Get top-50 candidates using semantic search (fast)
+    hits = util.semantic_search(query_embedding, doc_embeddings, top_k=50)
+    candidates = [documents[hit['corpus_id']] for hit in hits[0]]
+
+    # cross-encoder reranking
+    ce_rf = get_model("cross-encoder/ms-marco-MiniLM-L-6-v2", loader=load_cross_encoder)
+
+    results = ce_rf(
+        query=query,
+        documents=candidates,
+        top_k=3
+    )
+
+    #  results
+    for result in results:
+        print(f"Index: {result.index}")
+        print(f"Score: {result.score:.6f}")
+        print(f"Text: {result.text}\n")
+
+
+if __name__ == "__main__":
+    main()
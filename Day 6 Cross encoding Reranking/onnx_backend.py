@@ -0,0 +1,123 @@
+"""
+ONNX Runtime CPU backend for the SentenceTransformer and CrossEncoder models.
+
+A model is exported to ONNX once, dynamically quantized to int8, and cached on
+disk; later loads reuse the cached file. Needs sentence-transformers>=4.1 and
+`optimum[onnxruntime]` (see requirements.txt).
+
+    python onnx_backend.py all-MiniLM-L6-v2          # export + parity check
+"""
+import os
+import platform
+import sys
+from collections import namedtuple
+
+import numpy as np
+from sentence_transformers import CrossEncoder, SentenceTransformer
+
+DEFAULT_CACHE_DIR = os.path.join(".cache", "onnx")
+
+
+def default_quantization_config() -> str:
+    """Picks the onnxruntime quantization preset for the current CPU."""
+    return "arm64" if platform.machine().lower() in ("arm64", "aarch64") else "avx2"
+
+
+def _onnx_file(quantize: bool, config: str) -> str:
+    return f"onnx/model_qint8_{config}.onnx" if quantize else "onnx/model.onnx"
+
+
+def load_onnx(model_name: str, cache_dir: str = DEFAULT_CACHE_DIR, quantize: bool = True,
+              quantization_config: str = None, model_class=SentenceTransformer,
+              threads: int = None):
+    """
+    Loads model_name on the ONNX backend, exporting (and quantizing) it on first use.
+    The export lives under cache_dir/<model name>, so the cost is paid once per machine.
+    threads caps the ONNX Runtime session's intra-op thread pool (default: every core).
+    """
+    from sentence_transformers import export_dynamic_quantized_onnx_model
+
+    config = quantization_config or default_quantization_config()
+    path = os.path.join(cache_dir, model_name.replace("/", "__"))
+    file_name = _onnx_file(quantize, config)
+
+    if not os.path.exists(os.path.join(path, file_name)):
+        # backend="onnx" converts the torch weights when no ONNX file is published
+        model = model_class(model_name, backend="onnx")
+        model.save_pretrained(path)
+        if quantize:
+            export_dynamic_quantized_onnx_model(model, config, path)
+
+    model_kwargs = {"file_name": file_name}
+    if threads:
+        import onnxruntime
+
+        options = onnxruntime.SessionOptions()
+        options.intra_op_num_threads = threads
+        options.inter_op_num_threads = 1
+        model_kwargs["session_options"] = options
+
+    return model_class(path, backend="onnx", model_kwargs=model_kwargs)
+
+
+def load_onnx_cross_encoder(model_name: str, **kwargs) -> CrossEncoder:
+    return load_onnx(model_name, model_class=CrossEncoder, **kwargs)
+
+
+RerankResult = namedtuple("RerankResult", ["text", "score", "index"])
+
+
+class OnnxCrossEncoderRerankFunction:
+    """
+    Cross-encoder reranker on the ONNX backend.
+    Called like pymilvus' CrossEncoderRerankFunction and returns results
+    with the same text / score / index fields.
+    """
+
+    def __init__(self, model_name: str = "cross-encoder/ms-marco-MiniLM-L-6-v2", **kwargs):
+        self.model = load_onnx_cross_encoder(model_name, **kwargs)
+
+    def __call__(self, query: str, documents: list, top_k: int = 5):
+        scores = self.model.predict([(query, doc) for doc in documents])
+        order = np.argsort(scores)[::-1][:top_k]
+        return [RerankResult(documents[i], float(scores[i]), int(i)) for i in order]
+
+
+def check_parity(model_name: str, texts: list, min_cosine: float = 0.98, **kwargs) -> dict:
+    """
+    Compares ONNX embeddings against the torch model's for the same texts.
+    Reports per-text cosine similarity between the two backends.
+    """
+    reference = SentenceTransformer(model_name).encode(texts, normalize_embeddings=True)
+    candidate = load_onnx(model_name, **kwargs).encode(texts, normalize_embeddings=True)
+
+    cosine = np.sum(reference * candidate, axis=1)
+    return {
+        "min_cosine": float(cosine.min()),
+        "mean_cosine": float(cosine.mean()),
+        "ok": bool(cosine.min() >= min_cosine),
+    }
+
+
+def check_cross_encoder_parity(model_name: str, pairs: list, **kwargs) -> dict:
+    """
+    Compares ONNX cross-encoder scores against torch for the same (query, doc) pairs.
+    Rank agreement matters more than raw scores for reranking.
+    """
+    reference = CrossEncoder(model_name).predict(pairs)
+    candidate = load_onnx_cross_encoder(model_name, **kwargs).predict(pairs)
+
+    return {
+        "max_abs_diff": float(np.max(np.abs(reference - candidate))),
+        "same_ranking": bool(np.array_equal(np.argsort(reference), np.argsort(candidate))),
+    }
+
+
+if __name__ == "__main__":
+    name = sys.argv[1] if len(sys.argv) > 1 else "all-MiniLM-L6-v2"
+    samples = [
+        "Vector search allows us to compare meaning instead of keywords.",
+        "FAISS provides efficient similarity search over dense embeddings.",
+        "Dogs are loyal animals and make good pets.",
+    ]
+    print(name, check_parity(name, samples))
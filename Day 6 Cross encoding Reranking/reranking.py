@@ -3,30 +3,52 @@ pip install --upgrade pymilvus
 pip install "pymilvus[model]"
 '''
 from typing import List
+import os
 import torch
 from pymilvus.model.reranker import CrossEncoderRerankFunction
 
-# Define the rerank function
-ce_rf = CrossEncoderRerankFunction(
-    model_name="cross-encoder/ms-marco-MiniLM-L-6-v2",  # Specify the model name.
-    device="cpu" # Specify the device to use, e.g., 'cpu' or 'cuda:0'
-)
-
-query = "What event in 1956 marked the official birth of artificial intelligence as a discipline?"
-
-documents = [
-    "In 1950, Alan Turing published his seminal paper, 'Computing Machinery and Intelligence,' proposing the Turing Test as a criterion of intelligence, a foundational concept in the philosophy and development of artificial intelligence.",
-    "The Dartmouth Conference in 1956 is considered the birthplace of artificial intelligence as a field; here, John McCarthy and others coined the term 'artificial intelligence' and laid out its basic goals.",
-    "In 1951, British mathematician and computer scientist Alan Turing also developed the first program designed to play chess, demonstrating an early example of AI in game strategy.",
-    "The invention of the Logic Theorist by Allen Newell, Herbert A. Simon, and Cliff Shaw in 1955 marked the creation of the first true AI program, which was capable of solving logic problems, akin to proving mathematical theorems."
-]
-
-results = ce_rf(
-    query=query,
-    documents=documents,
-    top_k=3,
-)
-for result in results:
-    print(f"Index: {result.index}")
-    print(f"Score: {result.score:.6f}")
-    print(f"Text: {result.text}\n")
+from model_registry import get_model
+from onnx_backend import OnnxCrossEncoderRerankFunction
+
+
+def load_cross_encoder(model_name):
+    return CrossEncoderRerankFunction(
+        model_name=model_name,  # Specify the model name.
+        device="cpu" # Specify the device to use, e.g., 'cpu' or 'cuda:0'
+    )
+
+
+def load_reranker():
+    """
+    The rerank function, loaded once per process via the registry.
+    RERANK_BACKEND=onnx runs the same model through int8-quantized ONNX Runtime.
+    """
+    if os.getenv("RERANK_BACKEND") == "onnx":
+        return get_model("cross-encoder/ms-marco-MiniLM-L-6-v2", loader=OnnxCrossEncoderRerankFunction)
+    return get_model("cross-encoder/ms-marco-MiniLM-L-6-v2", loader=load_cross_encoder)
+
+
+def main():
+    query = "What event in 1956 marked the official birth of artificial intelligence as a discipline?"
+
+    documents = [
+        "In 1950, Alan Turing published his seminal paper, 'Computing Machinery and Intelligence,' proposing the Turing Test as a criterion of intelligence, a foundational concept in the philosophy and development of artificial intelligence.",
+        "The Dartmouth Conference in 1956 is considered the birthplace of artificial intelligence as a field; here, John McCarthy and others coined the term 'artificial intelligence' and laid out its basic goals.",
+        "In 1951, British mathematician and computer scientist Alan Turing also developed the first program designed to play chess, demonstrating an early example of AI in game strategy.",
+        "The invention of the Logic Theorist by Allen Newell, Herbert A. Simon, and Cliff Shaw in 1955 marked the creation of the first true AI program, which was capable of solving logic problems, akin to proving mathematical theorems."
+    ]
+
+    ce_rf = load_reranker()
+    results = ce_rf(
+        query=query,
+        documents=documents,
+        top_k=3,
+    )
+    for result in results:
+        print(f"Index: {result.index}")
+        print(f"Score: {result.score:.6f}")
+        print(f"Text: {result.text}\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,20 +1,18 @@
 import chromadb
 from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer
+from model_registry import get_model
 from docs import documents
 
 # Use PersistentClient to save data to disk
 client = chromadb.PersistentClient(path="./chroma_db")
 
-# Load the sentence transformer model
-model = SentenceTransformer("all-MiniLM-L6-v2")
-
 class SentenceTransformerEmbedding(embedding_functions.EmbeddingFunction):
     def __init__(self):
         pass
     
     def __call__(self, input):
-        return model.encode(input).tolist()
+        # Model is loaded on first use and shared across calls
+        return get_model("all-MiniLM-L6-v2").encode(input).tolist()
 
 COLLECTION_NAME = "fusion_demo"
 
@@ -1,18 +1,18 @@
 from collections import defaultdict
 import chromadb
 from chromadb.utils import embedding_functions
-from sentence_transformers import SentenceTransformer
+from model_registry import get_model
 
 # Use PersistentClient to load data from disk
 client = chromadb.PersistentClient(path="./chroma_db")
-model = SentenceTransformer("all-MiniLM-L6-v2")
 
 class SentenceTransformerEmbedding(embedding_functions.EmbeddingFunction):
     def __init__(self):
         pass
     
     def __call__(self, input):
-        return model.encode(input).tolist()
+        # Model is loaded on first use and shared across calls
+        return get_model("all-MiniLM-L6-v2").encode(input).tolist()
 
 COLLECTION_NAME = "fusion_demo"
 